@@ -1,9 +1,6 @@
 """AI Wikipedia Golf package."""
 
 from .config import ExperimentConfig, LLMConfig, LoopConfig, GameConfig
-from .experiment import run_experiment
-from .evaluation import evaluate_books
-from .visualize import launch_dashboard
 
 __all__ = [
     "ExperimentConfig",
@@ -14,3 +11,22 @@ __all__ = [
     "evaluate_books",
     "launch_dashboard",
 ]
+
+# Entry points are imported on first use so that importing the package (and
+# the CLI) does not load LLM SDKs or Gradio.
+_LAZY_ATTRS = {
+    "run_experiment": ".experiment",
+    "evaluate_books": ".evaluation",
+    "launch_dashboard": ".visualize",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
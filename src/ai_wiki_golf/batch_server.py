@@ -0,0 +1,213 @@
+"""Local stand-in for the OpenAI Batch API.
+
+Implements the subset used by ``OpenAIBatchClient`` (file upload, batch
+create/retrieve, file content, and plain chat completions for resent lines)
+and answers each batch line by forwarding it to an ordinary chat-completions
+endpoint. Useful for testing batch evaluation against local or non-batch
+providers.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import requests
+
+
+class BatchStore:
+    """In-memory files and batches; batches run on a background thread pool."""
+
+    def __init__(self, upstream_url: str, *, concurrency: int = 4, timeout: float = 300.0):
+        self.upstream_url = upstream_url.rstrip("/")
+        self.timeout = timeout
+        self.files: dict[str, dict[str, Any]] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> dict[str, Any]:
+        meta = {
+            "id": f"file-{next(self._ids)}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self._lock:
+            self.files[meta["id"]] = {"meta": meta, "content": content}
+        return meta
+
+    def create_batch(self, body: dict[str, Any], authorization: str | None) -> dict[str, Any]:
+        input_file = self.files.get(body.get("input_file_id", ""))
+        if input_file is None:
+            raise KeyError(body.get("input_file_id"))
+        lines = [
+            json.loads(line)
+            for line in input_file["content"].decode("utf-8").splitlines()
+            if line.strip()
+        ]
+        batch = {
+            "id": f"batch-{next(self._ids)}",
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(
+            target=self._run_batch, args=(batch, lines, authorization), daemon=True
+        ).start()
+        return batch
+
+    def _run_batch(self, batch: dict[str, Any], lines: list[dict[str, Any]], authorization: str | None) -> None:
+        headers = {"Authorization": authorization} if authorization else {}
+        records = list(self._executor.map(lambda line: self._answer(line, headers), lines))
+        ok = [r for r in records if r.get("error") is None]
+        failed = [r for r in records if r.get("error") is not None]
+        with self._lock:
+            if ok:
+                batch["output_file_id"] = self._store_jsonl(ok)
+            if failed:
+                batch["error_file_id"] = self._store_jsonl(failed)
+            batch["request_counts"] = {"total": len(records), "completed": len(ok), "failed": len(failed)}
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+
+    def chat(self, body: dict[str, Any], authorization: str | None) -> requests.Response:
+        """Forward one non-streaming chat completion to the upstream endpoint."""
+        headers = {"Authorization": authorization} if authorization else {}
+        return requests.post(
+            f"{self.upstream_url}/chat/completions",
+            json={**body, "stream": False},
+            headers=headers,
+            timeout=self.timeout,
+        )
+
+    def _answer(self, line: dict[str, Any], headers: dict[str, str]) -> dict[str, Any]:
+        record: dict[str, Any] = {"id": f"req-{next(self._ids)}", "custom_id": line.get("custom_id")}
+        try:
+            response = self.chat(line.get("body", {}), headers.get("Authorization"))
+            body = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            record.update(response=None, error={"code": "upstream_error", "message": str(exc)})
+            return record
+        record["response"] = {"status_code": response.status_code, "body": body}
+        record["error"] = None if response.ok else {"code": "upstream_status", "message": str(body)}
+        return record
+
+    def _store_jsonl(self, records: list[dict[str, Any]]) -> str:
+        content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        meta = {
+            "id": f"file-{next(self._ids)}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": "output.jsonl",
+            "purpose": "batch_output",
+            "status": "processed",
+        }
+        self.files[meta["id"]] = {"meta": meta, "content": content}
+        return meta["id"]
+
+
+def serve_batches(
+    upstream_url: str,
+    *,
+    host: str = "127.0.0.1",
+    port: int = 8780,
+    concurrency: int = 4,
+) -> None:
+    """Serve the stand-in Batch API at ``http://host:port/v1`` until interrupted."""
+    store = BatchStore(upstream_url, concurrency=concurrency)
+    server = ThreadingHTTPServer((host, port), _handler(store))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _handler(store: BatchStore) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = self.path.rstrip("/")
+            if path.endswith("/files"):
+                fields = _parse_multipart(self.headers.get("Content-Type", ""), body)
+                filename, content = fields.get("file", ("upload.jsonl", b""))
+                purpose = fields.get("purpose", ("", b"batch"))[1].decode("utf-8")
+                self._send(200, store.add_file(filename, purpose, content))
+            elif path.endswith("/batches"):
+                try:
+                    batch = store.create_batch(json.loads(body), self.headers.get("Authorization"))
+                except (KeyError, ValueError) as exc:
+                    self._send(400, {"error": {"message": f"Invalid batch request: {exc}"}})
+                    return
+                self._send(200, batch)
+            elif path.endswith("/chat/completions"):
+                try:
+                    response = store.chat(json.loads(body), self.headers.get("Authorization"))
+                except (requests.RequestException, ValueError) as exc:
+                    self._send(502, {"error": {"message": f"Upstream request failed: {exc}"}})
+                    return
+                self._send_bytes(response.status_code, response.content, "application/json")
+            else:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def do_GET(self) -> None:
+            parts = self.path.rstrip("/").split("/")
+            if len(parts) >= 2 and parts[-2] == "batches" and parts[-1] in store.batches:
+                with store._lock:
+                    self._send(200, dict(store.batches[parts[-1]]))
+            elif len(parts) >= 3 and parts[-3] == "files" and parts[-1] == "content" and parts[-2] in store.files:
+                self._send_bytes(200, store.files[parts[-2]]["content"], "application/jsonl")
+            elif len(parts) >= 2 and parts[-2] == "files" and parts[-1] in store.files:
+                self._send(200, store.files[parts[-1]]["meta"])
+            else:
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def _send(self, status: int, payload: dict[str, Any]) -> None:
+            self._send_bytes(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+        def _send_bytes(self, status: int, data: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict[str, tuple[str, bytes]]:
+    """Parse a multipart/form-data body into ``{field: (filename, payload)}``."""
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields: dict[str, tuple[str, bytes]] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = (part.get_filename() or "", part.get_payload(decode=True) or b"")
+    return fields
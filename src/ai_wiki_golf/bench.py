@@ -0,0 +1,333 @@
+"""Offline benchmark of the game loop against a synthetic wiki and a scripted LLM."""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+import yaml
+
+from .config import ExperimentConfig, GameConfig, LLMConfig, LoopConfig
+from .game import GameOutcome, WikipediaGolfRunner
+from .llm import BaseLLMClient, LLMResult
+from .log_store import iter_logs
+
+_CANDIDATES_RE = re.compile(r"選択肢(?:\(\|区切り\))?\s*[:：]\s*([^\n。]*)")
+_GOAL_RE = re.compile(r"- ゴール: (.+)")
+
+# Modules each CLI command imports before doing any work (see cli.py).
+COMMAND_MODULES = {
+    "run": "ai_wiki_golf.experiment",
+    "evaluate": "ai_wiki_golf.evaluation",
+    "eval-stats": "ai_wiki_golf.evaluation",
+    "convert-logs": "ai_wiki_golf.log_store",
+    "telemetry": "ai_wiki_golf.telemetry",
+    "import-dump": "ai_wiki_golf.wikidump",
+    "batch-server": "ai_wiki_golf.batch_server",
+    "oracle": "ai_wiki_golf.oracle",
+    "bench": "ai_wiki_golf.bench",
+    "viz": "ai_wiki_golf.visualize",
+}
+# Slow imports that only the providers / dashboard that use them should pay for.
+HEAVY_MODULES = ("openai", "google.generativeai", "gradio")
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+class SyntheticWiki:
+    """In-process random link graph with the same interface as the wiki clients.
+
+    Page ``i`` links to ``degree`` random pages plus page ``i + 1`` so every
+    goal is reachable. Titles contain no digits so ``exclude_digit_links``
+    keeps them.
+    """
+
+    def __init__(self, pages: int = 10_000, degree: int = 50, *, seed: int = 0):
+        rng = random.Random(seed)
+        self._titles = [_synthetic_title(i) for i in range(pages)]
+        self._ids = {title: i for i, title in enumerate(self._titles)}
+        self._links: list[list[int]] = []
+        self._backlinks: list[list[int]] = [[] for _ in range(pages)]
+        for i in range(pages):
+            targets = set(rng.sample(range(pages), min(degree, pages)))
+            targets.add((i + 1) % pages)
+            targets.discard(i)
+            ordered = sorted(targets)
+            self._links.append(ordered)
+            for target in ordered:
+                self._backlinks[target].append(i)
+        self._rng = random.Random(seed + 1)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def get_random_pages(self, limit: int = 1) -> list[str]:
+        return self._rng.sample(self._titles, min(limit, len(self._titles)))
+
+    def get_page_abstract(self, title: str) -> Optional[str]:
+        return f"{title}は合成ページです。" if title in self._ids else None
+
+    def get_links(self, title: str) -> Optional[list[str]]:
+        page_id = self._ids.get(title)
+        if page_id is None:
+            return None
+        return [self._titles[t] for t in self._links[page_id]]
+
+    def get_links_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        return {title: self.get_links(title) for title in dict.fromkeys(titles)}
+
+    def get_backlinks_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        results: dict[str, Optional[list[str]]] = {}
+        for title in dict.fromkeys(titles):
+            page_id = self._ids.get(title)
+            results[title] = None if page_id is None else [self._titles[s] for s in self._backlinks[page_id]]
+        return results
+
+    def get_backlink_count(self, title: str) -> int:
+        page_id = self._ids.get(title)
+        return 0 if page_id is None else len(self._backlinks[page_id])
+
+    def has_at_least_backlinks(self, title: str, n: int) -> bool:
+        return n <= 0 or self.get_backlink_count(title) >= n
+
+    def has_at_least_backlinks_many(self, titles: Iterable[str], n: int) -> dict[str, bool]:
+        return {title: self.has_at_least_backlinks(title, n) for title in dict.fromkeys(titles)}
+
+    def close(self) -> None:
+        pass
+
+
+class ScriptedLLM(BaseLLMClient):
+    """Deterministic stand-in LLM that sleeps ``latency`` seconds per call.
+
+    Turn prompts are answered with the goal when it is a candidate and a
+    random candidate otherwise; anything else gets a short fixed book.
+    """
+
+    def __init__(self, config: LLMConfig, *, latency: float = 0.0, seed: int = 0):
+        super().__init__(config)
+        self.latency = latency
+        self._rng = random.Random(seed)
+
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        matches = _CANDIDATES_RE.findall(prompt)
+        if matches:
+            candidates = matches[-1].split("|")
+            goals = _GOAL_RE.findall("\n".join(m["content"] for m in messages if m["role"] == "user"))
+            goal = goals[-1].strip() if goals else None
+            choice = goal if goal in candidates else self._rng.choice(candidates)
+            text = f"考察: 合成応答\n移動先: {choice}"
+        else:
+            text = "- ゴールに近いページを優先する。\n- 上位概念のページを経由する。"
+        usage = {"input_tokens": sum(len(m["content"]) for m in messages), "output_tokens": len(text)}
+        return LLMResult(text=text, usage=usage, timings={"latency": time.perf_counter() - started})
+
+
+def bench_config(*, max_steps: int = 20, max_links: int = 100, prefetch_links: int = 0) -> ExperimentConfig:
+    return ExperimentConfig(
+        llm=LLMConfig(provider="openrouter", model="scripted-bench"),
+        game=GameConfig(max_steps=max_steps, max_links=max_links, prefetch_links=prefetch_links),
+        loop=LoopConfig(iterations=1, seed=0),
+    )
+
+
+def run_benchmarks(
+    *,
+    pages: int = 10_000,
+    degree: int = 50,
+    latency: float = 0.0,
+    games: int = 20,
+    workers: int = 1,
+    max_steps: int = 20,
+    prefetch_links: int = 0,
+    scenarios: Iterable[str] = ("play", "experiment", "evaluate"),
+    trace_memory: bool = True,
+) -> list[dict[str, Any]]:
+    """Run each scenario on a fresh synthetic wiki and return one result row per scenario.
+
+    ``trace_memory`` reports the tracemalloc peak, which also slows Python code
+    down noticeably; turn it off when comparing throughput only.
+    """
+    config = bench_config(max_steps=max_steps, prefetch_links=prefetch_links)
+    # run_experiment plays one game per iteration.
+    config.loop.iterations = games
+    wiki = SyntheticWiki(pages, degree)
+    pairs = [
+        {"start": start, "goal": goal}
+        for start, goal in zip(wiki.get_random_pages(games), wiki.get_random_pages(games))
+    ]
+    config.evaluation_pairs = pairs
+    results = []
+    for scenario in scenarios:
+        llm = ScriptedLLM(config.llm, latency=latency)
+        with tempfile.TemporaryDirectory(prefix="ai-wiki-golf-bench-") as tmp:
+            exp_path = Path(tmp)
+            (exp_path / "config.yaml").write_text(
+                yaml.safe_dump(config.to_dict(), allow_unicode=True), encoding="utf-8"
+            )
+            if scenario == "play":
+                body = lambda: _bench_play(config, llm, wiki, pairs)
+            elif scenario == "experiment":
+                body = lambda: _bench_run_experiment(exp_path, llm, wiki)
+            elif scenario == "evaluate":
+                body = lambda: _bench_evaluate(exp_path, llm, wiki, workers)
+            else:
+                raise ValueError(f"Unknown benchmark scenario: {scenario}")
+            results.append({"scenario": scenario, **_measure(body, trace_memory)})
+    return results
+
+
+def _bench_play(
+    config: ExperimentConfig, llm: BaseLLMClient, wiki: SyntheticWiki, pairs: list[dict[str, str]]
+) -> list[GameOutcome]:
+    runner = WikipediaGolfRunner(config, llm, wiki)
+    return [
+        runner.play("合成ベンチマーク用の攻略本", start=p["start"], goal=p["goal"], update_book=False)
+        for p in pairs
+    ]
+
+
+def _bench_run_experiment(exp_path: Path, llm: BaseLLMClient, wiki: SyntheticWiki) -> Path:
+    from .experiment import run_experiment
+
+    run_experiment(str(exp_path), llm_client=llm, wiki_client=wiki)
+    return exp_path / "logs"
+
+
+def _bench_evaluate(
+    exp_path: Path, llm: BaseLLMClient, wiki: SyntheticWiki, workers: int
+) -> Path:
+    from .evaluation import evaluate_books
+
+    books_dir = exp_path / "books"
+    books_dir.mkdir()
+    for idx in (0, 100):
+        (books_dir / f"{idx}.txt").write_text("合成ベンチマーク用の攻略本", encoding="utf-8")
+    evaluate_books(str(exp_path), workers=workers, llm_client=llm, wiki_client=wiki)
+    return exp_path / "evaluates"
+
+
+def _load_logs(log_dir: Path) -> list[dict[str, Any]]:
+    return [data for _, data in iter_logs(log_dir)]
+
+
+def _measure(body: Callable[[], list[GameOutcome] | Path], trace_memory: bool) -> dict[str, Any]:
+    """Time ``body``; scenarios that write logs return the log directory instead of outcomes."""
+    peak = 0
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = body()
+        elapsed = time.perf_counter() - started
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    games = _load_logs(result) if isinstance(result, Path) else result
+    turn_times = sorted(_turn_times(games))
+    return {
+        "games": len(games),
+        "turns": len(turn_times),
+        "seconds": elapsed,
+        "games_per_sec": len(games) / elapsed if elapsed else 0.0,
+        "turns_per_sec": len(turn_times) / elapsed if elapsed else 0.0,
+        "turn_p50_ms": _percentile(turn_times, 0.50) * 1000,
+        "turn_p99_ms": _percentile(turn_times, 0.99) * 1000,
+        "peak_mib": peak / 2**20 if trace_memory else None,
+    }
+
+
+def _turn_times(games: list[Any]) -> Iterable[float]:
+    for game in games:
+        if isinstance(game, GameOutcome):
+            for step in game.steps:
+                yield step.timings.get("time_to_move", 0.0)
+        else:
+            for step in (game.get("game") or {}).get("history") or []:
+                yield (step.get("timings") or {}).get("time_to_move", 0.0)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _synthetic_title(index: int) -> str:
+    letters = string.ascii_lowercase
+    name = ""
+    while True:
+        index, rem = divmod(index, len(letters))
+        name = letters[rem] + name
+        if index == 0:
+            break
+    return f"合成{name}"
+
+
+def measure_import_times(commands: Iterable[str] | None = None, *, runs: int = 3) -> list[dict[str, Any]]:
+    """Import cost of each CLI command, measured with ``python -X importtime`` in a fresh process.
+
+    Each command is imported ``runs`` times and the fastest run is kept, since
+    the slower ones mostly measure a cold disk cache.
+    """
+    src_dir = str(Path(__file__).resolve().parent.parent)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    results = []
+    for command in commands or COMMAND_MODULES:
+        module = COMMAND_MODULES.get(command)
+        if module is None:
+            raise ValueError(f"Unknown command: {command}")
+        best: dict[str, Any] | None = None
+        for _ in range(max(1, runs)):
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import ai_wiki_golf.cli, {module}"],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            row = _parse_importtime(proc.stderr)
+            if best is None or row["import_ms"] < best["import_ms"]:
+                best = row
+        results.append({"command": command, **best})
+    return results
+
+
+def _parse_importtime(stderr: str) -> dict[str, Any]:
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        if not indent:
+            total_us += int(cumulative)
+    return {
+        "import_ms": total_us / 1000,
+        "modules": len(modules),
+        "heavy": [name for name in HEAVY_MODULES if name in modules],
+    }
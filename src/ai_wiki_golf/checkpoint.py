@@ -0,0 +1,161 @@
+"""Append-only per-turn game checkpoints for resuming interrupted games."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .game import StepRecord
+
+
+@dataclass
+class ResumedGame:
+    start: str
+    goal: str
+    goal_abstract: str | None
+    messages: list[dict[str, str]] = field(default_factory=list)
+    turn_starts: list[int] = field(default_factory=list)
+    steps: list[StepRecord] = field(default_factory=list)
+    usage: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+    # Set once the turn loop has ended: {"success": bool, "llm_calls": [...]}.
+    finished: dict[str, Any] | None = None
+
+
+class TurnCheckpoint:
+    """JSON-lines file next to a game log, appended to (and fsynced) after every turn.
+
+    The first line identifies the game (start, goal, guide hash), each later
+    line holds the messages and step of one completed turn plus cumulative
+    usage, and a final ``end`` line marks that only the review is left. A
+    torn last line from a crash is ignored.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._written = 0
+
+    def load(self, guide_text: str) -> ResumedGame | None:
+        """Return the recorded game, or None if there is none for this guide."""
+        if not self.path.exists():
+            return None
+        records = []
+        valid_bytes = 0
+        with self.path.open("rb") as fh:
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    records.append(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                valid_bytes += len(line)
+        if valid_bytes < self.path.stat().st_size:
+            # Drop a torn last line so later appends start on a fresh line.
+            with self.path.open("r+b") as fh:
+                fh.truncate(valid_bytes)
+        if not records or records[0].get("type") != "game":
+            return None
+        header = records[0]
+        if header.get("guide_sha256") != _guide_hash(guide_text):
+            return None
+        game = ResumedGame(
+            start=header["start"], goal=header["goal"], goal_abstract=header.get("goal_abstract")
+        )
+        for record in records[1:]:
+            if record.get("type") == "turn":
+                game.turn_starts.append(len(game.messages))
+                game.steps.append(StepRecord(**record["step"]))
+            elif record.get("type") != "end":
+                continue
+            game.messages.extend(record["messages"])
+            game.usage = record["usage"]
+            game.timings = record["timings"]
+            game.elapsed = record["elapsed"]
+            if record["type"] == "end":
+                game.finished = {"success": record["success"], "llm_calls": record["llm_calls"]}
+                break
+        self._written = len(game.messages)
+        return game
+
+    def begin(self, start: str, goal: str, guide_text: str, goal_abstract: str | None) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._written = 0
+        header = {
+            "type": "game",
+            "start": start,
+            "goal": goal,
+            "guide_sha256": _guide_hash(guide_text),
+            "goal_abstract": goal_abstract,
+        }
+        with self.path.open("w", encoding="utf-8") as fh:
+            fh.write(json.dumps(header, ensure_ascii=False) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def record_turn(
+        self,
+        messages: list[dict[str, str]],
+        step: StepRecord,
+        usage: dict[str, Any],
+        timings: dict[str, float],
+        elapsed: float,
+    ) -> None:
+        self._append(
+            {"type": "turn", "step": asdict(step)},
+            messages,
+            usage,
+            timings,
+            elapsed,
+        )
+
+    def record_end(
+        self,
+        messages: list[dict[str, str]],
+        success: bool,
+        llm_calls: list[dict[str, Any]],
+        usage: dict[str, Any],
+        timings: dict[str, float],
+        elapsed: float,
+    ) -> None:
+        self._append(
+            {"type": "end", "success": success, "llm_calls": llm_calls},
+            messages,
+            usage,
+            timings,
+            elapsed,
+        )
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def _append(
+        self,
+        record: dict[str, Any],
+        messages: list[dict[str, str]],
+        usage: dict[str, Any],
+        timings: dict[str, float],
+        elapsed: float,
+    ) -> None:
+        record.update(
+            messages=messages[self._written :], usage=usage, timings=timings, elapsed=elapsed
+        )
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._written = len(messages)
+
+
+def checkpoint_for(log_path: Path) -> TurnCheckpoint:
+    """Checkpoint file used while the game for ``log_path`` is in progress."""
+    return TurnCheckpoint(log_path.with_name(f"{log_path.stem}.turns.jsonl"))
+
+
+def _guide_hash(guide_text: str) -> str:
+    return hashlib.sha256(guide_text.encode("utf-8")).hexdigest()
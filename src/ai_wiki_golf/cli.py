@@ -1,58 +1,243 @@
 from __future__ import annotations
 
-import typer
+from pathlib import Path
 
-from .evaluation import evaluate_books, summarize_evaluation_results
-from .experiment import run_experiment
-from .visualize import launch_dashboard
+import typer
 
+# Commands import what they need in their body so that startup stays cheap:
+# provider SDKs and Gradio are only loaded by the commands that use them.
 app = typer.Typer(help="Wikipediaゴルフ自動プレイツール")
 
 
 @app.command()
 def run(experiment_dir: str = typer.Argument(..., help="Experiment directory")) -> None:
     """Run an experiment loop."""
+    from .experiment import run_experiment
+
     run_experiment(experiment_dir)
 
 
 @app.command()
-def evaluate(experiment_dir: str = typer.Argument(..., help="Experiment directory")) -> None:
+def evaluate(
+    experiment_dir: str = typer.Argument(..., help="Experiment directory"),
+    workers: int = typer.Option(1, "--workers", "-w", min=1, help="Number of games to play concurrently"),
+    batch: bool = typer.Option(
+        False, "--batch", help="Play all games in lock-step and send each turn through the Batch API"
+    ),
+    oracle: bool = typer.Option(
+        False, "--oracle", help="Compute the shortest distance of unsolved pairs before playing"
+    ),
+) -> None:
     """Evaluate saved books on the predefined dataset."""
-    evaluate_books(experiment_dir)
+    from .evaluation import evaluate_books
+
+    evaluate_books(experiment_dir, workers=workers, batch=batch, oracle=oracle)
 
 
 @app.command(name="eval-stats")
 def eval_stats(experiment_dir: str = typer.Argument(..., help="Experiment directory")) -> None:
     """Show average success rate for each evaluated book."""
+    from .evaluation import summarize_evaluation_results
 
     stats = summarize_evaluation_results(experiment_dir)
     if not stats:
         typer.echo("No evaluation logs found. Please run 'ai-wiki-golf evaluate <experiment_dir>' first.")
         raise typer.Exit(code=1)
 
-    header = f"{'Book':>6} {'Success':>8} {'Attempts':>10} {'Success Rate':>15}"
+    header = f"{'Book':>6} {'Success':>8} {'Attempts':>10} {'Success Rate':>15} {'Excess':>8}"
     typer.echo(header)
     typer.echo("-" * len(header))
 
     total_success = 0
     total_runs = 0
+    total_excess = 0.0
+    excess_runs = 0
     for entry in stats:
         rate_pct = entry["success_rate"] * 100
         total_success += entry["success_count"]
         total_runs += entry["total_runs"]
+        if entry["mean_excess"] is not None:
+            total_excess += entry["mean_excess"] * entry["excess_runs"]
+            excess_runs += entry["excess_runs"]
         typer.echo(
             f"{entry['book_index']:>6} {entry['success_count']:>8} {entry['total_runs']:>10} {rate_pct:>13.1f}%"
+            f" {_format_excess(entry['mean_excess']):>8}"
         )
 
     if total_runs:
         overall = (total_success / total_runs) * 100
+        overall_excess = total_excess / excess_runs if excess_runs else None
         typer.echo("-" * len(header))
-        typer.echo(f"{'ALL':>6} {total_success:>8} {total_runs:>10} {overall:>13.1f}%")
+        typer.echo(
+            f"{'ALL':>6} {total_success:>8} {total_runs:>10} {overall:>13.1f}% {_format_excess(overall_excess):>8}"
+        )
+    typer.echo("Excess: mean steps beyond the shortest path over successful games ('ai-wiki-golf oracle').")
+
+
+def _format_excess(value: float | None) -> str:
+    return "-" if value is None else f"+{value:.2f}"
+
+
+@app.command()
+def oracle(
+    experiment_dir: str = typer.Argument(..., help="Experiment directory"),
+    max_depth: int = typer.Option(8, "--max-depth", min=1, help="Give up on pairs farther apart than this"),
+    max_visited: int = typer.Option(
+        2_000_000, "--max-visited", min=1, help="Give up once the search has reached this many pages"
+    ),
+    force: bool = typer.Option(False, "--force", help="Recompute pairs that already have a distance"),
+) -> None:
+    """Record the shortest distance and one shortest path for each evaluation pair."""
+    from .oracle import solve_evaluation_pairs
+
+    pairs = solve_evaluation_pairs(experiment_dir, max_depth=max_depth, max_visited=max_visited, force=force)
+    solved = [pair["distance"] for pair in pairs if pair.get("distance") is not None]
+    summary = f"Solved {len(solved)}/{len(pairs)} pairs"
+    if solved:
+        summary += f", mean distance {sum(solved) / len(solved):.2f}"
+    typer.echo(summary)
+
+
+@app.command(name="convert-logs")
+def convert_logs(
+    experiment_dir: str = typer.Argument(..., help="Experiment directory"),
+    remove_yaml: bool = typer.Option(False, "--remove-yaml", help="Delete YAML logs after converting"),
+) -> None:
+    """Convert YAML logs in logs/ and evaluates/ to the compact log format."""
+    from .log_store import convert_yaml_logs
+
+    for subdir in ("logs", "evaluates"):
+        log_dir = Path(experiment_dir) / subdir
+        if log_dir.exists():
+            count = convert_yaml_logs(log_dir, remove=remove_yaml)
+            typer.echo(f"{subdir}: converted {count} logs")
+
+
+@app.command()
+def telemetry(
+    experiment_dir: str = typer.Argument(..., help="Experiment directory"),
+    output: Path = typer.Option(..., "--output", "-o", help="File to write"),
+    fmt: str = typer.Option("jsonl", "--format", help="jsonl or openmetrics"),
+) -> None:
+    """Export per-turn timing spans and LLM call tokens from game logs."""
+    from .telemetry import iter_telemetry, to_openmetrics, write_jsonl
+
+    if fmt == "jsonl":
+        count = write_jsonl(iter_telemetry(experiment_dir), output)
+        typer.echo(f"Wrote {count} records to {output}")
+    elif fmt == "openmetrics":
+        output.write_text(to_openmetrics(iter_telemetry(experiment_dir)), encoding="utf-8")
+        typer.echo(f"Wrote metrics to {output}")
+    else:
+        raise typer.BadParameter("--format must be jsonl or openmetrics")
+
+
+@app.command(name="import-dump")
+def import_dump(
+    page_dump: Path = typer.Argument(..., help="page.sql(.gz) dump"),
+    pagelinks_dump: Path = typer.Argument(..., help="pagelinks.sql(.gz) dump"),
+    redirect_dump: Path = typer.Argument(..., help="redirect.sql(.gz) dump"),
+    output_dir: Path = typer.Argument(..., help="Directory to write the link graph to"),
+    linktarget_dump: Path | None = typer.Option(
+        None, "--linktarget", help="linktarget.sql(.gz) dump (required for 2024+ pagelinks schema)"
+    ),
+) -> None:
+    """Build an offline link graph for wiki.backend: dump."""
+    from .wikidump import import_dump as build_graph
+
+    pages = build_graph(
+        page_dump, pagelinks_dump, redirect_dump, output_dir, linktarget_dump=linktarget_dump
+    )
+    typer.echo(f"Imported {pages} pages into {output_dir}")
+
+
+@app.command(name="batch-server")
+def batch_server(
+    upstream: str = typer.Option(..., "--upstream", help="Chat-completions base URL to forward batch lines to"),
+    host: str = typer.Option("127.0.0.1", "--host"),
+    port: int = typer.Option(8780, "--port"),
+    concurrency: int = typer.Option(4, "--concurrency", min=1, help="Upstream requests in flight"),
+) -> None:
+    """Run a local stand-in for the OpenAI Batch API."""
+    from .batch_server import serve_batches
+
+    typer.echo(f"Serving Batch API at http://{host}:{port}/v1 (upstream: {upstream})")
+    serve_batches(upstream, host=host, port=port, concurrency=concurrency)
+
+
+@app.command()
+def bench(
+    pages: int = typer.Option(10_000, "--pages", min=2, help="Pages in the synthetic wiki"),
+    degree: int = typer.Option(50, "--degree", min=1, help="Links per synthetic page"),
+    latency: float = typer.Option(0.0, "--latency", min=0.0, help="Scripted LLM latency per call (seconds)"),
+    games: int = typer.Option(20, "--games", min=1, help="Games per scenario (evaluate plays 2 books x games)"),
+    workers: int = typer.Option(1, "--workers", "-w", min=1, help="Workers for the evaluate scenario"),
+    max_steps: int = typer.Option(20, "--max-steps", min=1),
+    prefetch_links: int = typer.Option(0, "--prefetch-links", min=0),
+    scenario: list[str] = typer.Option(
+        ["play", "experiment", "evaluate"], "--scenario", "-s", help="play, experiment or evaluate"
+    ),
+    trace_memory: bool = typer.Option(
+        True, "--trace-memory/--no-trace-memory", help="Report tracemalloc peak (slows the run)"
+    ),
+) -> None:
+    """Benchmark the game loop offline with a synthetic wiki and a scripted LLM."""
+    from .bench import run_benchmarks
+
+    results = run_benchmarks(
+        pages=pages,
+        degree=degree,
+        latency=latency,
+        games=games,
+        workers=workers,
+        max_steps=max_steps,
+        prefetch_links=prefetch_links,
+        scenarios=scenario,
+        trace_memory=trace_memory,
+    )
+    header = (
+        f"{'Scenario':<11} {'Games':>6} {'Turns':>6} {'Games/s':>9} {'Turns/s':>9}"
+        f" {'p50 ms':>8} {'p99 ms':>8} {'Peak MiB':>9}"
+    )
+    typer.echo(header)
+    typer.echo("-" * len(header))
+    for row in results:
+        peak = "-" if row["peak_mib"] is None else f"{row['peak_mib']:.1f}"
+        typer.echo(
+            f"{row['scenario']:<11} {row['games']:>6} {row['turns']:>6} {row['games_per_sec']:>9.2f}"
+            f" {row['turns_per_sec']:>9.1f} {row['turn_p50_ms']:>8.2f} {row['turn_p99_ms']:>8.2f}"
+            f" {peak:>9}"
+        )
+
+
+@app.command(name="import-bench")
+def import_bench(
+    command: list[str] = typer.Option(None, "--command", "-c", help="Commands to measure (default: all)"),
+    runs: int = typer.Option(3, "--runs", min=1, help="Fresh interpreters per command; the fastest is kept"),
+    max_ms: float = typer.Option(None, "--max-ms", help="Exit with 1 if any command imports slower than this"),
+) -> None:
+    """Measure the import time of each command with python -X importtime."""
+    from .bench import measure_import_times
+
+    results = measure_import_times(command or None, runs=runs)
+    header = f"{'Command':<13} {'Import ms':>10} {'Modules':>8}  Heavy modules"
+    typer.echo(header)
+    typer.echo("-" * len(header))
+    for row in results:
+        typer.echo(
+            f"{row['command']:<13} {row['import_ms']:>10.1f} {row['modules']:>8}  {', '.join(row['heavy']) or '-'}"
+        )
+    slow = [row["command"] for row in results if max_ms is not None and row["import_ms"] > max_ms]
+    if slow:
+        typer.echo(f"Slower than {max_ms:.0f} ms: {', '.join(slow)}", err=True)
+        raise typer.Exit(code=1)
 
 
 @app.command()
 def viz(experiment_dir: str = typer.Argument(".", help="Experiment directory")) -> None:
     """Launch the Gradio dashboard."""
+    from .visualize import launch_dashboard
+
     launch_dashboard(experiment_dir)
 
 
@@ -14,6 +14,16 @@ class LLMConfig:
     options: dict[str, Any] = field(default_factory=dict)
     base_url: str | None = None
     timeout: float | None = 120.0
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    max_retries: int = 6
+    prompt_cache: bool = False
+    prompt_cache_ttl: int = 3600
+    stream: bool = False
+    cache_mode: Literal["off", "record", "replay", "record-missing"] = "off"
+    cache_dir: str = "llm_cache"
+    batch_base_url: str | None = None
+    batch_poll_interval: float = 10.0
 
 
 @dataclass
@@ -24,6 +34,9 @@ class GameConfig:
     retry_limit: int = 3
     include_goal_abstract: bool = False
     min_goal_backlinks: int = 1
+    random_batch_size: int = 500
+    prefetch_links: int = 0
+    context_turns: int = 0
 
 
 @dataclass
@@ -36,6 +49,16 @@ class LoopConfig:
 class WikiConfig:
     name: str = "Wikipedia"
     base_url: str = "https://ja.wikipedia.org"
+    backend: Literal["api", "dump"] = "api"
+    dump_dir: str | None = None
+    cache_path: str | None = None
+    cache_ttl: float = 7 * 24 * 3600
+    cache_max_entries: int = 200_000
+    pool_maxsize: int = 10
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    timeout: float = 30.0
+    requests_per_second: float | None = None
 
     @property
     def api_url(self) -> str:
@@ -54,6 +77,7 @@ class ExperimentConfig:
     loop: LoopConfig = field(default_factory=LoopConfig)
     evaluation_pairs: list[dict[str, str]] | None = None
     wiki: WikiConfig = field(default_factory=WikiConfig)
+    log_format: Literal["yaml", "compact"] = "yaml"
 
     @classmethod
     def load(cls, path: Path) -> "ExperimentConfig":
@@ -71,6 +95,7 @@ class ExperimentConfig:
             loop=loop_cfg,
             evaluation_pairs=evaluation_pairs,
             wiki=wiki_cfg,
+            log_format=config_dict.get("log_format", "yaml"),
         )
 
     def to_dict(self) -> dict[str, Any]:
@@ -80,4 +105,5 @@ class ExperimentConfig:
             "loop": self.loop.__dict__,
             "evaluation_pairs": self.evaluation_pairs,
             "wiki": self.wiki.__dict__,
+            "log_format": self.log_format,
         }
@@ -0,0 +1,30 @@
+"""Loading and saving evaluation start/goal pairs."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable
+
+import yaml
+
+from .config import ExperimentConfig
+from .log_store import write_atomic
+
+PAIRS_FILE = "evaluation_pairs.yaml"
+
+
+def load_eval_pairs(config: ExperimentConfig, exp_path: Path) -> list[dict[str, Any]]:
+    if config.evaluation_pairs:
+        return config.evaluation_pairs
+    default_path = exp_path / PAIRS_FILE
+    if default_path.exists():
+        return yaml.safe_load(default_path.read_text(encoding="utf-8"))
+    built_in = Path(__file__).resolve().parent.parent / "data" / "eval_pairs.yaml"
+    if built_in.exists():
+        return yaml.safe_load(built_in.read_text(encoding="utf-8"))
+    raise RuntimeError("Evaluation pairs not provided. Set evaluation_pairs in config or add evaluation_pairs.yaml.")
+
+
+def save_eval_pairs(pairs: Iterable[dict[str, Any]], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(path, yaml.safe_dump(list(pairs), allow_unicode=True, sort_keys=False).encode("utf-8"))
@@ -1,20 +1,34 @@
 from __future__ import annotations
 
 import os
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-import yaml
 from dotenv import load_dotenv
 
+from .checkpoint import checkpoint_for
 from .config import ExperimentConfig
+from .eval_pairs import load_eval_pairs
 from .experiment import _build_log_payload
-from .game import WikipediaGolfRunner
-from .llm import build_llm_client
-
-
-def evaluate_books(experiment_dir: str) -> None:
+from .game import GameOutcome, GameSteps, WikipediaGolfRunner
+from .llm import BaseLLMClient, LLMResult, build_llm_client
+from .log_store import log_exists, read_summaries, write_log
+
+
+def evaluate_books(
+    experiment_dir: str,
+    workers: int = 1,
+    batch: bool = False,
+    oracle: bool = False,
+    *,
+    llm_client: BaseLLMClient | None = None,
+    wiki_client: Any = None,
+) -> None:
+    if batch and workers > 1:
+        raise ValueError("--workers cannot be combined with --batch: batch mode plays every game in lock-step")
     exp_path = Path(experiment_dir)
     config_path = exp_path / "config.yaml"
     if not config_path.exists():
@@ -23,8 +37,8 @@ def evaluate_books(experiment_dir: str) -> None:
     load_dotenv(exp_path / ".env")
     load_dotenv()
     config = ExperimentConfig.load(config_path)
-    llm_client = build_llm_client(config.llm, os.environ)
-    runner = WikipediaGolfRunner(config, llm_client)
+    if llm_client is None:
+        llm_client = build_llm_client(config.llm, os.environ, exp_path, batch=batch)
 
     books_dir = exp_path / "books"
     eval_dir = exp_path / "evaluates"
@@ -34,23 +48,103 @@ def evaluate_books(experiment_dir: str) -> None:
     if not target_indices:
         raise RuntimeError("No evaluation targets found (books/{i}.txt missing)")
 
-    pairs = _load_eval_pairs(config, exp_path)
+    if oracle:
+        from .oracle import solve_evaluation_pairs
+
+        pairs = solve_evaluation_pairs(experiment_dir, wiki_client=wiki_client)
+    else:
+        pairs = load_eval_pairs(config, exp_path)
+    jobs: list[tuple[Path, int, str, dict[str, Any]]] = []
     for idx in target_indices:
         guide = (books_dir / f"{idx}.txt").read_text(encoding="utf-8")
         for pair_idx, pair in enumerate(pairs, start=1):
             log_path = eval_dir / f"book_{idx:02d}_pair_{pair_idx:02d}.yaml"
-            if log_path.exists():
+            if log_exists(eval_dir, log_path.stem):
                 continue
-            outcome = runner.play(
-                guide_text=guide,
-                start=pair["start"],
-                goal=pair["goal"],
-                update_book=False,
-            )
-            payload = _build_log_payload(config, outcome)
-            payload["book_index"] = idx
-            payload["pair"] = pair
-            log_path.write_text(yaml.safe_dump(payload, allow_unicode=True), encoding="utf-8")
+            jobs.append((log_path, idx, guide, pair))
+
+    def save_outcome(job: tuple[Path, int, str, dict[str, Any]], outcome: GameOutcome) -> None:
+        log_path, idx, _, pair = job
+        payload = _build_log_payload(config, outcome)
+        payload["book_index"] = idx
+        payload["pair"] = pair
+        write_log(eval_dir, log_path.stem, payload, config.log_format)
+        checkpoint_for(log_path).discard()
+
+    if batch:
+        _evaluate_in_lockstep(
+            WikipediaGolfRunner(config, llm_client, wiki_client), llm_client, jobs, save_outcome
+        )
+        return
+
+    # Runners hold per-game helpers (HTTP session, prefetcher), so each worker
+    # thread gets its own; the LLM client is shared.
+    local = threading.local()
+
+    def play_job(job: tuple[Path, int, str, dict[str, Any]]) -> None:
+        runner = getattr(local, "runner", None)
+        if runner is None:
+            runner = local.runner = WikipediaGolfRunner(config, llm_client, wiki_client)
+        log_path, _, guide, pair = job
+        outcome = runner.play(
+            guide_text=guide,
+            start=pair["start"],
+            goal=pair["goal"],
+            update_book=False,
+            checkpoint=checkpoint_for(log_path),
+        )
+        save_outcome(job, outcome)
+
+    if workers <= 1:
+        for job in jobs:
+            play_job(job)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluate") as executor:
+        futures = [executor.submit(play_job, job) for job in jobs]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _evaluate_in_lockstep(
+    runner: WikipediaGolfRunner,
+    llm_client: BaseLLMClient,
+    jobs: list[tuple[Path, int, str, dict[str, Any]]],
+    save_outcome: Callable[[tuple[Path, int, str, dict[str, Any]], GameOutcome], None],
+) -> None:
+    """Advance all games together, sending each round's turn requests as one batch."""
+
+    def advance(job: Any, game: GameSteps, result: LLMResult | None) -> tuple | None:
+        try:
+            request = next(game) if result is None else game.send(result)
+        except StopIteration as stop:
+            save_outcome(job, stop.value)
+            return None
+        return job, game, request
+
+    live = []
+    for job in jobs:
+        log_path, _, guide, pair = job
+        game = runner.play_steps(
+            guide,
+            start=pair["start"],
+            goal=pair["goal"],
+            update_book=False,
+            checkpoint=checkpoint_for(log_path),
+        )
+        entry = advance(job, game, None)
+        if entry is not None:
+            live.append(entry)
+
+    while live:
+        results = llm_client.generate_batch([request for _, _, request in live])
+        advanced = (advance(job, game, result) for (job, game, _), result in zip(live, results))
+        live = [entry for entry in advanced if entry is not None]
 
 
 def summarize_evaluation_results(experiment_dir: str) -> list[dict[str, Any]]:
@@ -61,55 +155,49 @@ def summarize_evaluation_results(experiment_dir: str) -> list[dict[str, Any]]:
     if not eval_dir.exists():
         return []
 
-    stats: dict[int, dict[str, float]] = defaultdict(lambda: {"success": 0, "total": 0})
+    stats: dict[int, dict[str, float]] = defaultdict(
+        lambda: {"success": 0, "total": 0, "excess": 0, "excess_runs": 0}
+    )
 
-    for log_file in eval_dir.glob("*.yaml"):
-        try:
-            data = yaml.safe_load(log_file.read_text(encoding="utf-8")) or {}
-        except yaml.YAMLError:
+    for entry in read_summaries(eval_dir):
+        if entry.get("broken"):
             continue
-
-        book_index = data.get("book_index")
+        book_index = entry.get("book_index")
         if book_index is None:
-            book_index = _extract_book_index(log_file.stem)
+            book_index = _extract_book_index(entry["name"].split(".")[0])
         if book_index is None:
             continue
 
-        score = data.get("game", {}).get("score")
+        score = entry.get("score")
         success = isinstance(score, (int, float)) and score != 9999
         stats[book_index]["total"] += 1
         if success:
             stats[book_index]["success"] += 1
+            # Steps taken beyond the shortest path, for pairs solved by the oracle.
+            if entry.get("distance") is not None:
+                stats[book_index]["excess"] += score - entry["distance"]
+                stats[book_index]["excess_runs"] += 1
 
     results: list[dict[str, Any]] = []
     for idx in sorted(stats):
         total = stats[idx]["total"] or 0
         success = stats[idx]["success"] or 0
         success_rate = success / total if total else 0.0
+        excess_runs = int(stats[idx]["excess_runs"])
         results.append(
             {
                 "book_index": idx,
                 "success_count": int(success),
                 "total_runs": int(total),
                 "success_rate": success_rate,
+                "mean_excess": stats[idx]["excess"] / excess_runs if excess_runs else None,
+                "excess_runs": excess_runs,
             }
         )
 
     return results
 
 
-def _load_eval_pairs(config: ExperimentConfig, exp_path: Path) -> list[dict[str, Any]]:
-    if config.evaluation_pairs:
-        return config.evaluation_pairs
-    default_path = exp_path / "evaluation_pairs.yaml"
-    if default_path.exists():
-        return yaml.safe_load(default_path.read_text(encoding="utf-8"))
-    built_in = Path(__file__).resolve().parent.parent / "data" / "eval_pairs.yaml"
-    if built_in.exists():
-        return yaml.safe_load(built_in.read_text(encoding="utf-8"))
-    raise RuntimeError("Evaluation pairs not provided. Set evaluation_pairs in config or add evaluation_pairs.yaml.")
-
-
 def _extract_book_index(log_stem: str) -> int | None:
     if not log_stem.startswith("book_"):
         return None
@@ -4,15 +4,21 @@ import os
 from pathlib import Path
 from typing import Any
 
-import yaml
 from dotenv import load_dotenv
 
+from .checkpoint import checkpoint_for
 from .config import ExperimentConfig
 from .game import GameOutcome, StepRecord, WikipediaGolfRunner
-from .llm import build_llm_client
+from .llm import BaseLLMClient, build_llm_client
+from .log_store import write_log
 
 
-def run_experiment(experiment_dir: str) -> None:
+def run_experiment(
+    experiment_dir: str,
+    *,
+    llm_client: BaseLLMClient | None = None,
+    wiki_client: Any = None,
+) -> None:
     exp_path = Path(experiment_dir)
     config_path = exp_path / "config.yaml"
     if not config_path.exists():
@@ -27,8 +33,11 @@ def run_experiment(experiment_dir: str) -> None:
     books_dir.mkdir(parents=True, exist_ok=True)
     logs_dir.mkdir(parents=True, exist_ok=True)
 
-    llm_client = build_llm_client(config.llm, os.environ)
-    runner = WikipediaGolfRunner(config, llm_client)
+    if llm_client is None:
+        llm_client = build_llm_client(config.llm, os.environ, exp_path)
+    runner = WikipediaGolfRunner(config, llm_client, wiki_client)
+    # Validate start/goal pairs in the background while the LLM writes books.
+    runner.start_goal_pool.start()
 
     initial_book_path = books_dir / "0.txt"
     if initial_book_path.exists():
@@ -49,12 +58,14 @@ def run_experiment(experiment_dir: str) -> None:
         return
 
     for iteration in range(start_iteration, config.loop.iterations + 1):
-        outcome = runner.play(guide_text=guide, update_book=True)
+        log_path = logs_dir / f"{iteration}.yaml"
+        checkpoint = checkpoint_for(log_path)
+        outcome = runner.play(guide_text=guide, update_book=True, checkpoint=checkpoint)
         guide = outcome.final_book or guide
         (books_dir / f"{iteration}.txt").write_text(guide, encoding="utf-8")
-        log_path = logs_dir / f"{iteration}.yaml"
         log_payload = _build_log_payload(config, outcome)
-        log_path.write_text(yaml.safe_dump(log_payload, allow_unicode=True), encoding="utf-8")
+        write_log(logs_dir, str(iteration), log_payload, config.log_format)
+        checkpoint.discard()
 
 
 def _build_log_payload(config: ExperimentConfig, outcome: GameOutcome) -> dict[str, Any]:
@@ -70,9 +81,13 @@ def _build_log_payload(config: ExperimentConfig, outcome: GameOutcome) -> dict[s
                     "current": step.current,
                     "candidates": step.candidates,
                     "choice": step.choice,
+                    **({"timings": step.timings} if step.timings else {}),
+                    **({"llm_calls": step.llm_calls} if step.llm_calls else {}),
                 }
                 for step in outcome.steps
             ],
+            **({"timings": outcome.timings} if outcome.timings else {}),
+            **({"llm_calls": outcome.llm_calls} if outcome.llm_calls else {}),
         },
         "cost": outcome.usage,
     }
@@ -2,12 +2,20 @@ from __future__ import annotations
 
 import random
 import re
-from dataclasses import dataclass
-from typing import Any, Iterable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Generator
 
 from .config import ExperimentConfig
-from .llm import BaseLLMClient, LLMResult
-from .mediawiki import MediaWikiClient
+from .llm import BaseLLMClient, LLMRequest, LLMResult
+from .mediawiki import WikiClient, build_wiki_client
+from .moves import MoveResolver
+from .pair_pool import StartGoalPool
+from .prefetch import LinkPrefetcher
+
+if TYPE_CHECKING:
+    from .checkpoint import TurnCheckpoint
 
 
 @dataclass
@@ -15,6 +23,8 @@ class StepRecord:
     current: str
     candidates: list[str]
     choice: str
+    timings: dict[str, float] = field(default_factory=dict)
+    llm_calls: list[dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
@@ -27,6 +37,22 @@ class GameOutcome:
     messages: list[dict[str, str]]
     usage: dict[str, Any]
     final_book: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    # LLM calls outside recorded steps: review/shorten and an abandoned last turn.
+    llm_calls: list[dict[str, Any]] = field(default_factory=list)
+
+# Game logic is written as generators that yield the LLM requests they need
+# and receive the results, so games can be driven one call at a time (play) or
+# many in lock-step through a batch endpoint.
+GameSteps = Generator[LLMRequest, LLMResult, Any]
+
+_DIGIT_RE = re.compile(r"[0-9０-９]")
+
+
+def has_digit(title: str) -> bool:
+    """Titles with digits are hidden from the candidates when ``exclude_digit_links`` is set."""
+    return bool(_DIGIT_RE.search(title))
+
 
 # TODO: exclude_digit_links の場合、そのことをプロンプトにも記載
 
@@ -34,11 +60,23 @@ class WikipediaGolfRunner:
     BOOK_CHAR_LIMIT = 2000
     LINK_SAMPLE_SEED = 20251113
 
-    def __init__(self, config: ExperimentConfig, llm: BaseLLMClient):
+    def __init__(
+        self, config: ExperimentConfig, llm: BaseLLMClient, wiki_client: WikiClient | None = None
+    ):
         self.config = config
         self.llm = llm
         self.rng = random.Random(config.loop.seed)
-        self.wiki_client = MediaWikiClient(config.wiki.api_url)
+        # Not ``or``: dump and synthetic wikis define __len__ and may be empty.
+        self.wiki_client = build_wiki_client(config.wiki) if wiki_client is None else wiki_client
+        self.start_goal_pool = StartGoalPool(
+            self.wiki_client,
+            min_goal_backlinks=config.game.min_goal_backlinks,
+            batch_size=config.game.random_batch_size,
+        )
+        # Shared by the per-game prefetchers (see ``_new_prefetcher``).
+        self._prefetch_executor: ThreadPoolExecutor | None = None
+        if config.game.prefetch_links > 0:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
         self.wiki_name = config.wiki.name
         self._wiki_notice = self._build_wiki_notice(self.wiki_name)
 
@@ -60,7 +98,9 @@ class WikipediaGolfRunner:
         book = self._clean_book_text(result.text)
         if len(book) > self.BOOK_CHAR_LIMIT:
             messages.append({"role": "assistant", "content": result.text})
-            book, usage = self._request_shorter_book(messages, usage, len(book))
+            book, usage = _drive(
+                self._request_shorter_book(messages, usage, len(book), []), self.llm
+            )
         else:
             book = book[: self.BOOK_CHAR_LIMIT]
         return book, messages, usage
@@ -72,23 +112,97 @@ class WikipediaGolfRunner:
         start: str | None = None,
         goal: str | None = None,
         update_book: bool = True,
+        checkpoint: TurnCheckpoint | None = None,
     ) -> GameOutcome:
+        return _drive(
+            self.play_steps(
+                guide_text,
+                start=start,
+                goal=goal,
+                update_book=update_book,
+                checkpoint=checkpoint,
+            ),
+            self.llm,
+        )
+
+    def play_steps(
+        self,
+        guide_text: str,
+        *,
+        start: str | None = None,
+        goal: str | None = None,
+        update_book: bool = True,
+        checkpoint: TurnCheckpoint | None = None,
+    ) -> GameSteps:
+        """Same as ``play`` but yields each LLM request; returns the GameOutcome.
+
+        With a ``checkpoint``, every completed turn is appended to it and a game
+        recorded there for the same guide (and start/goal, if given) resumes
+        after its last completed turn instead of starting over.
+        """
+        resumed = checkpoint.load(guide_text) if checkpoint is not None else None
+        if resumed is not None and start is not None and (start, goal) != (resumed.start, resumed.goal):
+            resumed = None
         if start is None or goal is None:
-            start, goal = self._choose_start_goal()
-        history = [start]
+            start, goal = (resumed.start, resumed.goal) if resumed else self._choose_start_goal()
+        game_started = time.perf_counter()
+        game_timings = {"wiki_fetch": 0.0, "llm": 0.0}
+        intro = self._build_intro(guide_text)
         steps: list[StepRecord] = []
         messages: list[dict[str, str]] = []
+        turn_starts: list[int] = []
         usage: dict[str, Any] = {}
         success = False
         goal_abstract: str | None = None
-        if self.config.game.include_goal_abstract:
-            goal_abstract = self.wiki_client.get_page_abstract(goal)
+        if resumed is not None:
+            steps, messages, turn_starts = resumed.steps, resumed.messages, resumed.turn_starts
+            usage = _merge_usage(resumed.usage, {"resumed_turns": len(steps)})
+            game_timings.update(resumed.timings)
+            game_started -= resumed.elapsed
+            goal_abstract = resumed.goal_abstract
+            if resumed.finished is not None:
+                return (yield from self._finalize_outcome(
+                    start,
+                    goal,
+                    steps,
+                    resumed.finished["success"],
+                    messages,
+                    usage,
+                    guide_text,
+                    update_book,
+                    cache_prefix=intro,
+                    timings=game_timings,
+                    llm_calls=resumed.finished["llm_calls"],
+                ))
+            success = bool(steps) and steps[-1].choice == goal
+        else:
+            if self.config.game.include_goal_abstract:
+                goal_abstract = self.wiki_client.get_page_abstract(goal)
+                game_timings["wiki_fetch"] += time.perf_counter() - game_started
+            if checkpoint is not None:
+                checkpoint.begin(start, goal, guide_text, goal_abstract)
+        history = [start] + [step.choice for step in steps]
+        prefetcher = self._new_prefetcher()
+        fetch_links = self.wiki_client.get_links if prefetcher is None else prefetcher.get_links
 
-        for turn in range(1, self.config.game.max_steps + 1):
+        # A resumed game continues after its last completed turn.
+        first_turn = self.config.game.max_steps + 1 if success else len(steps) + 1
+        for turn in range(first_turn, self.config.game.max_steps + 1):
             current = history[-1]
-            candidates = self._build_candidates(current, history)
+            turn_started = time.perf_counter()
+            links = fetch_links(current) or []
+            fetched = time.perf_counter()
+            candidates = self._build_candidates(current, history, links)
+            timings = {
+                "wiki_fetch": fetched - turn_started,
+                "candidates": time.perf_counter() - fetched,
+            }
+            game_timings["wiki_fetch"] += timings["wiki_fetch"]
+            turn_calls: list[dict[str, Any]] = []
             if not candidates:
                 break
+            if prefetcher is not None:
+                prefetcher.prefetch(candidates, goal)
             prompt = self._build_turn_prompt(
                 guide_text=guide_text,
                 start=start,
@@ -100,18 +214,36 @@ class WikipediaGolfRunner:
                 goal_abstract=goal_abstract if turn == 1 else None,
                 include_intro=(turn == 1),
             )
+            turn_starts.append(len(messages))
             messages.append({"role": "user", "content": prompt})
-            llm_result = self.llm.generate(messages)
+            llm_result = yield from self._call_llm(
+                "turn",
+                turn_calls,
+                LLMRequest(
+                    self._context_messages(messages, turn_starts, steps),
+                    cache_prefix=intro,
+                    stop_when=_has_move_line,
+                ),
+            )
+            move_arrived = _move_arrival(llm_result, time.perf_counter())
             usage = _merge_usage(usage, llm_result.usage)
             assistant_text = llm_result.text
             messages.append({"role": "assistant", "content": assistant_text})
 
-            move, valid = self._extract_move(assistant_text, candidates)
+            resolver = MoveResolver(candidates)
+            move, valid = self._extract_move(assistant_text, resolver)
             invalid_attempts = 0
             while not valid:
                 invalid_attempts += 1
                 if invalid_attempts >= self.config.game.retry_limit:
-                    return self._finalize_outcome(
+                    usage = _close_prefetcher(prefetcher, usage)
+                    game_timings["llm"] += sum(call["latency"] for call in turn_calls)
+                    game_timings["total"] = time.perf_counter() - game_started
+                    if checkpoint is not None:
+                        checkpoint.record_end(
+                            messages, False, turn_calls, usage, game_timings, game_timings["total"]
+                        )
+                    return (yield from self._finalize_outcome(
                         start,
                         goal,
                         steps,
@@ -120,26 +252,65 @@ class WikipediaGolfRunner:
                         usage=usage,
                         guide_text=guide_text,
                         update_book=update_book,
-                    )
+                        cache_prefix=intro,
+                        timings=game_timings,
+                        llm_calls=turn_calls,
+                    ))
                 correction_prompt = (
                     f"\n「{move or '不明'}」は選択肢に存在しません。"
                     f"選択肢: {'|'.join(candidates)}。\n"
                     "ゴールに近づくため、次に移動するページを選択肢から1つだけ選んでください。1行目に『考察: 検討過程(100文字まで)』、2行目に『移動先: 選択肢』としてください。"
                 )
                 messages.append({"role": "user", "content": correction_prompt})
-                retry_result = self.llm.generate(messages)
+                retry_result = yield from self._call_llm(
+                    "retry",
+                    turn_calls,
+                    LLMRequest(
+                        self._context_messages(messages, turn_starts, steps),
+                        cache_prefix=intro,
+                        stop_when=_has_move_line,
+                    ),
+                )
                 usage = _merge_usage(usage, retry_result.usage)
                 messages.append({"role": "assistant", "content": retry_result.text})
-                move, valid = self._extract_move(retry_result.text, candidates)
+                move, valid = self._extract_move(retry_result.text, resolver)
 
+            if resolver.retries_saved:
+                usage = _merge_usage(usage, {"retries_saved": resolver.retries_saved})
+            timings["llm"] = sum(call["latency"] for call in turn_calls)
+            retry_time = sum(call["latency"] for call in turn_calls if call["kind"] == "retry")
+            if retry_time:
+                timings["retries"] = retry_time
+            # Until the first reply's move line was complete; retries are timed separately.
+            if move_arrived is not None:
+                timings["time_to_move"] = move_arrived - turn_started
+            if "time_to_first_token" in llm_result.timings:
+                timings["time_to_first_token"] = llm_result.timings["time_to_first_token"]
+            game_timings["llm"] += timings["llm"]
             history.append(move)
-            steps.append(StepRecord(current=current, candidates=candidates, choice=move))
+            steps.append(
+                StepRecord(
+                    current=current,
+                    candidates=candidates,
+                    choice=move,
+                    timings=timings,
+                    llm_calls=turn_calls,
+                )
+            )
+            if checkpoint is not None:
+                checkpoint.record_turn(
+                    messages, steps[-1], usage, game_timings, time.perf_counter() - game_started
+                )
             if move == goal:
                 success = True
                 break
 
         score = len(steps) if success else 9999
-        return self._finalize_outcome(
+        usage = _close_prefetcher(prefetcher, usage)
+        game_timings["total"] = time.perf_counter() - game_started
+        if checkpoint is not None:
+            checkpoint.record_end(messages, success, [], usage, game_timings, game_timings["total"])
+        return (yield from self._finalize_outcome(
             start,
             goal,
             steps,
@@ -148,8 +319,64 @@ class WikipediaGolfRunner:
             usage,
             guide_text,
             update_book,
+            cache_prefix=intro,
+            timings=game_timings,
+        ))
+
+    def _new_prefetcher(self) -> LinkPrefetcher | None:
+        """One prefetcher per game, so interleaved games keep their own picks."""
+        if self._prefetch_executor is None:
+            return None
+        return LinkPrefetcher(
+            self.wiki_client,
+            limit=self.config.game.prefetch_links,
+            executor=self._prefetch_executor,
         )
 
+    def _call_llm(
+        self, kind: str, llm_calls: list[dict[str, Any]], request: LLMRequest
+    ) -> GameSteps:
+        """Yield ``request`` and append its latency and token counts to ``llm_calls``."""
+        started = time.perf_counter()
+        result = yield request
+        call: dict[str, Any] = {"kind": kind, "latency": time.perf_counter() - started}
+        if "time_to_first_token" in result.timings:
+            call["time_to_first_token"] = result.timings["time_to_first_token"]
+        for key in ("input_tokens", "output_tokens", "cached_input_tokens"):
+            if result.usage.get(key) is not None:
+                call[key] = result.usage[key]
+        llm_calls.append(call)
+        return result
+
+    def _context_messages(
+        self,
+        messages: list[dict[str, str]],
+        turn_starts: list[int],
+        steps: list[StepRecord],
+    ) -> list[dict[str, str]]:
+        """Return the messages to send, compacting old turns when ``context_turns`` is set.
+
+        The intro turn and the last ``context_turns`` turns are kept verbatim;
+        turns in between are replaced by a one-line move history prepended to
+        the first kept turn. The full transcript is still logged.
+        """
+        keep = self.config.game.context_turns
+        if keep <= 0 or len(turn_starts) <= keep + 1:
+            return messages
+        cut_from = turn_starts[1]
+        cut_to = turn_starts[-keep]
+        dropped_turns = len(turn_starts) - 1 - keep
+        moves = "; ".join(
+            f"{idx + 2}手目 {step.current} -> {step.choice}"
+            for idx, step in enumerate(steps[1 : 1 + dropped_turns])
+        )
+        summary = f"(省略した{dropped_turns}ターンの移動: {moves})\n"
+        first_kept = messages[cut_to]
+        compacted = messages[:cut_from]
+        compacted.append({"role": first_kept["role"], "content": summary + first_kept["content"]})
+        compacted.extend(messages[cut_to + 1 :])
+        return compacted
+
     def _finalize_outcome(
         self,
         start: str,
@@ -160,22 +387,33 @@ class WikipediaGolfRunner:
         usage: dict[str, Any],
         guide_text: str,
         update_book: bool,
-    ) -> GameOutcome:
+        cache_prefix: str | None = None,
+        timings: dict[str, float] | None = None,
+        llm_calls: list[dict[str, Any]] | None = None,
+    ) -> GameSteps:
         score = len(steps) if success else 9999
         final_book = guide_text
+        timings = dict(timings or {})
+        llm_calls = list(llm_calls or [])
         if update_book:
+            review_started = time.perf_counter()
             review_prompt = self._build_review_prompt(start, goal, steps, success)
             messages.append({"role": "user", "content": review_prompt})
-            review_result = self.llm.generate(messages)
+            review_result = yield from self._call_llm(
+                "review", llm_calls, LLMRequest(messages, cache_prefix=cache_prefix)
+            )
             usage = _merge_usage(usage, review_result.usage)
             messages.append({"role": "assistant", "content": review_result.text})
             draft_book = self._clean_book_text(review_result.text)
             if len(draft_book) > self.BOOK_CHAR_LIMIT:
-                final_book, usage = self._request_shorter_book(
-                    messages, usage, len(draft_book)
+                final_book, usage = yield from self._request_shorter_book(
+                    messages, usage, len(draft_book), llm_calls, cache_prefix=cache_prefix
                 )
             else:
                 final_book = draft_book[: self.BOOK_CHAR_LIMIT]
+            review_time = time.perf_counter() - review_started
+            timings["review"] = review_time
+            timings["total"] = timings.get("total", 0.0) + review_time
         return GameOutcome(
             start=start,
             goal=goal,
@@ -185,6 +423,8 @@ class WikipediaGolfRunner:
             messages=messages,
             usage=usage,
             final_book=final_book,
+            timings=timings,
+            llm_calls=llm_calls,
         )
 
     def _build_turn_prompt(
@@ -205,23 +445,7 @@ class WikipediaGolfRunner:
         goal_description = f"- ゴール概要: {goal_abstract}\n" if goal_abstract else ""
         parts = []
         if include_intro:
-            parts.append(
-                "あなたはWikipediaゴルフのプレイヤーです。\n"
-                "基本ルール:\n"
-                "- スタートとゴールのWikipediaページの間をリンクだけで移動します。\n"
-                "- 1ターンでできることは、現在のページからリンクされたページ、または過去に訪れたページへ戻ること。\n"
-                "- 20ターン以内にゴールへ到達できない場合は失敗。\n"
-                f"- 提示されるリンク数は最大{self.config.game.max_links}個。これ以上存在する場合はランダムに選ばれる。\n"
-            )
-            if self._wiki_notice:
-                parts.append(self._wiki_notice)
-            guide_section = guide_text.strip()
-            parts.append("攻略本:\n" + guide_section)
-            parts.append(
-                "行動のルール:\n"
-                "- 訪問済みページへ戻るか、現在のページのリンクから1つを選ぶ。\n"
-                "- 簡潔に考察し、最後の行は『移動先: 候補名』とする。"
-            )
+            parts.append(self._build_intro(guide_text))
         parts.append("状況:")
         parts.append(f"- ゴール: {goal}")
         parts.append(f"- 現在地: {current}")
@@ -235,6 +459,31 @@ class WikipediaGolfRunner:
         )
         return "\n".join(parts)
 
+    def _build_intro(self, guide_text: str) -> str:
+        """Rules and guide that open every game; identical for all games of a book.
+
+        It is sent as the very beginning of the first turn prompt so providers
+        can reuse it as a cached prefix.
+        """
+        parts = [
+            "あなたはWikipediaゴルフのプレイヤーです。\n"
+            "基本ルール:\n"
+            "- スタートとゴールのWikipediaページの間をリンクだけで移動します。\n"
+            "- 1ターンでできることは、現在のページからリンクされたページ、または過去に訪れたページへ戻ること。\n"
+            "- 20ターン以内にゴールへ到達できない場合は失敗。\n"
+            f"- 提示されるリンク数は最大{self.config.game.max_links}個。これ以上存在する場合はランダムに選ばれる。\n"
+        ]
+        if self._wiki_notice:
+            parts.append(self._wiki_notice)
+        guide_section = guide_text.strip()
+        parts.append("攻略本:\n" + guide_section)
+        parts.append(
+            "行動のルール:\n"
+            "- 訪問済みページへ戻るか、現在のページのリンクから1つを選ぶ。\n"
+            "- 簡潔に考察し、最後の行は『移動先: 候補名』とする。"
+        )
+        return "\n".join(parts)
+
     def _build_review_prompt(
         self,
         start: str,
@@ -261,20 +510,10 @@ class WikipediaGolfRunner:
         )
 
     def _choose_start_goal(self) -> tuple[str, str]:
-        min_backlinks = max(0, self.config.game.min_goal_backlinks)
-        while True:
-            pages = self.wiki_client.get_random_pages(limit=2)
-            if len(pages) == 2 and pages[0] != pages[1]:
-                start, goal = pages[0], pages[1]
-                if min_backlinks <= 0:
-                    return start, goal
-                goal_backlinks = self.wiki_client.get_backlink_count(goal)
-                if goal_backlinks >= min_backlinks:
-                    return start, goal
-
-    def _build_candidates(self, current: str, history: list[str]) -> list[str]:
+        return self.start_goal_pool.get()
+
+    def _build_candidates(self, current: str, history: list[str], links: list[str]) -> list[str]:
         past = list(dict.fromkeys(reversed(history[:-1])))
-        links = self.wiki_client.get_links(current) or []
         filtered_links = [link for link in links if self._allowed_link(link)]
         max_links = self.config.game.max_links
         if max_links > 0 and len(filtered_links) > max_links:
@@ -295,9 +534,9 @@ class WikipediaGolfRunner:
     def _allowed_link(self, link: str) -> bool:
         if not self.config.game.exclude_digit_links:
             return True
-        return not bool(re.search(r"[0-9０-９]", link))
+        return not has_digit(link)
 
-    def _extract_move(self, text: str, candidates: Iterable[str]) -> tuple[str | None, bool]:
+    def _extract_move(self, text: str, resolver: MoveResolver) -> tuple[str | None, bool]:
         matches = list(re.finditer(r"移動先\s*[:：]\s*(.+)", text))
         if not matches:
             return None, False
@@ -306,9 +545,9 @@ class WikipediaGolfRunner:
         move = re.sub(r"[。．\.\!！?？]+$", "", move).strip()
         if move.endswith("です"):
             move = move[:-2].strip()
-        for cand in candidates:
-            if cand == move:
-                return move, True
+        resolved = resolver.resolve(move)
+        if resolved is not None:
+            return resolved, True
         return move, False
 
     def _build_wiki_notice(self, wiki_name: str) -> str | None:
@@ -337,7 +576,9 @@ class WikipediaGolfRunner:
         messages: list[dict[str, str]],
         usage: dict[str, Any],
         current_length: int,
-    ) -> tuple[str, dict[str, Any]]:
+        llm_calls: list[dict[str, Any]],
+        cache_prefix: str | None = None,
+    ) -> GameSteps:
         limit = self.BOOK_CHAR_LIMIT
         messages.append(
             {
@@ -349,7 +590,9 @@ class WikipediaGolfRunner:
                 ),
             }
         )
-        retry = self.llm.generate(messages)
+        retry = yield from self._call_llm(
+            "shorten", llm_calls, LLMRequest(messages, cache_prefix=cache_prefix)
+        )
         usage = _merge_usage(usage, retry.usage)
         messages.append({"role": "assistant", "content": retry.text})
         cleaned_retry = self._clean_book_text(retry.text)
@@ -358,6 +601,45 @@ class WikipediaGolfRunner:
         return cleaned_retry, usage
 
 
+def _drive(steps: GameSteps, llm: BaseLLMClient) -> Any:
+    """Run a game generator to completion, answering each request with ``llm``."""
+    try:
+        request = next(steps)
+        while True:
+            result = llm.generate(
+                request.messages, cache_prefix=request.cache_prefix, stop_when=request.stop_when
+            )
+            request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+
+def _move_arrival(result: LLMResult, received: float) -> float | None:
+    """``perf_counter`` time at which the reply's move line was complete, if it has one.
+
+    ``received`` is when the whole reply was handed back; a streamed reply
+    reports how much earlier its move line arrived.
+    """
+    timings = result.timings
+    if "time_to_move" in timings and "latency" in timings:
+        return received - (timings["latency"] - timings["time_to_move"])
+    if _has_move_line(result.text + "\n"):
+        return received
+    return None
+
+
+def _has_move_line(text: str) -> bool:
+    """Whether a complete ``移動先:`` line has been received (used to stop streaming)."""
+    return re.search(r"移動先\s*[:：]\s*\S[^\n]*\n", text) is not None
+
+
+def _close_prefetcher(prefetcher: LinkPrefetcher | None, usage: dict[str, Any]) -> dict[str, Any]:
+    if prefetcher is None:
+        return usage
+    prefetcher.close()
+    return _merge_usage(usage, prefetcher.usage())
+
+
 def _merge_usage(base: dict[str, Any], addon: dict[str, Any]) -> dict[str, Any]:
     base = base or {}
     result = dict(base)
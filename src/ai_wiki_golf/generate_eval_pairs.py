@@ -3,15 +3,65 @@
 from __future__ import annotations
 
 import argparse
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Any, Iterable, Sequence
 
 import requests
-import yaml
 
 from .config import ExperimentConfig
-from .mediawiki import MediaWikiClient
+from .eval_pairs import PAIRS_FILE, save_eval_pairs
+from .mediawiki import WikiClient, build_wiki_client
+from .oracle import ShortestPathOracle, build_oracle, build_oracle_wiki_client
+from .pair_pool import StartGoalPool
+
+
+@dataclass(frozen=True)
+class DistanceBucket:
+    low: int
+    # None for an open-ended bucket such as "5+".
+    high: int | None
+    quota: int
+
+    @property
+    def label(self) -> str:
+        if self.high is None:
+            return f"{self.low}+"
+        return str(self.low) if self.high == self.low else f"{self.low}-{self.high}"
+
+    def contains(self, distance: int) -> bool:
+        return distance >= self.low and (self.high is None or distance <= self.high)
+
+
+def parse_buckets(spec: str) -> list[DistanceBucket]:
+    """Parse ``"2:3,3:3,4:2,5+:2"``: a distance (``n``, ``a-b`` or ``a+``) and its quota per entry."""
+    buckets = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        distance, sep, quota = item.partition(":")
+        if not sep or not quota.strip().isdigit():
+            raise ValueError(f"Invalid bucket {item!r}; expected <distance>:<count>")
+        distance = distance.strip()
+        if distance.endswith("+"):
+            low, high = int(distance[:-1]), None
+        elif "-" in distance:
+            low_text, high_text = distance.split("-", 1)
+            low, high = int(low_text), int(high_text)
+        else:
+            low = high = int(distance)
+        if low < 1 or (high is not None and high < low):
+            raise ValueError(f"Invalid distance range in bucket {item!r}")
+        buckets.append(DistanceBucket(low, high, int(quota)))
+    if not buckets:
+        raise ValueError("No distance buckets given")
+    ordered = sorted(buckets, key=lambda b: b.low)
+    for prev, cur in zip(ordered, ordered[1:]):
+        if prev.high is None or prev.high >= cur.low:
+            raise ValueError(f"Distance buckets {prev.label} and {cur.label} overlap")
+    return ordered
 
 
 def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
@@ -38,11 +88,30 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
         default=None,
         help="Override minimum backlinks for goal pages (defaults to config value)",
     )
+    parser.add_argument(
+        "--buckets",
+        help=(
+            "Fill quotas per shortest-path distance instead of drawing --count pairs, "
+            'e.g. "2:3,3:3,4:2,5+:2"'
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Pairs solved concurrently with --buckets (default: 8)",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=8,
+        help="Longest distance searched with --buckets (default: 8)",
+    )
     parser.add_argument(
         "--max-attempts",
         type=int,
         default=2000,
-        help="Maximum attempts to collect pairs before failing (default: 2000)",
+        help="Maximum candidate pairs to try before failing (default: 2000)",
     )
     return parser.parse_args(argv)
 
@@ -54,16 +123,17 @@ def load_config(exp_dir: Path) -> ExperimentConfig:
     return ExperimentConfig.load(config_path)
 
 
-def build_mediawiki_client(config: ExperimentConfig) -> MediaWikiClient:
-    return MediaWikiClient(config.wiki.api_url)
+def build_mediawiki_client(config: ExperimentConfig) -> WikiClient:
+    return build_wiki_client(config.wiki)
 
 
 def generate_pairs(
-    client: MediaWikiClient,
+    client: WikiClient,
     count: int,
     *,
     min_goal_backlinks: int,
     max_attempts: int,
+    batch_size: int = 500,
 ) -> list[dict[str, str]]:
     if count < 1:
         raise ValueError("count must be at least 1")
@@ -71,67 +141,179 @@ def generate_pairs(
     delay = 1.0
     pairs: list[dict[str, str]] = []
     seen: set[tuple[str, str]] = set()
+    pool = StartGoalPool(client, min_goal_backlinks=min_goal_backlinks, batch_size=batch_size)
 
-    while len(pairs) < count:
-        if attempts >= max_attempts:
-            raise RuntimeError(
-                "Failed to collect enough evaluation pairs. Increase --max-attempts or relax constraints."
-            )
-        try:
-            titles = client.get_random_pages(limit=2)
-        except requests.RequestException:  # pragma: no cover - network path
-            time.sleep(delay)
-            delay = min(delay * 1.5, 10)
-            continue
-
-        if len(titles) < 2:
-            continue
-        attempts += 1
-        start, goal = titles[0], titles[1]
-        if start == goal:
-            continue
-        if min_goal_backlinks > 0:
+    try:
+        while len(pairs) < count:
+            # Candidate pairs tried: taken from the pool or rejected by its goal check.
+            if attempts + pool.rejected >= max_attempts:
+                raise RuntimeError(
+                    "Failed to collect enough evaluation pairs. Increase --max-attempts or relax constraints."
+                )
             try:
-                backlinks = client.get_backlink_count(goal)
+                candidate = pool.get(timeout=1.0)
+            except TimeoutError:
+                continue
             except requests.RequestException:  # pragma: no cover - network path
                 time.sleep(delay)
                 delay = min(delay * 1.5, 10)
                 continue
-            if backlinks < min_goal_backlinks:
+            attempts += 1
+            if candidate in seen:
                 continue
-        candidate = (start, goal)
-        if candidate in seen:
-            continue
-        seen.add(candidate)
-        pairs.append({"start": start, "goal": goal})
+            seen.add(candidate)
+            start, goal = candidate
+            pairs.append({"start": start, "goal": goal})
+    finally:
+        pool.close()
 
     return pairs
 
 
+def generate_stratified_pairs(
+    client: WikiClient,
+    oracle: ShortestPathOracle,
+    buckets: Sequence[DistanceBucket],
+    *,
+    workers: int = 8,
+    min_goal_backlinks: int,
+    max_attempts: int,
+    batch_size: int = 500,
+) -> list[dict[str, Any]]:
+    """Draw random pairs and keep them until every distance bucket has its quota.
+
+    Workers solve pairs concurrently with ``oracle``; each search stops at
+    the longest distance that still has an open bucket, and workers stop
+    once all buckets are full. Progress is printed by the calling thread.
+    Returns the pairs (with ``distance`` and ``path``) in bucket order.
+    """
+    filled: dict[DistanceBucket, list[dict[str, Any]]] = {bucket: [] for bucket in buckets}
+    seen: set[tuple[str, str]] = set()
+    attempts = 0
+    lock = threading.Lock()
+    done = threading.Event()
+    progress: queue.SimpleQueue[str] = queue.SimpleQueue()
+    pool = StartGoalPool(
+        client,
+        min_goal_backlinks=min_goal_backlinks,
+        batch_size=batch_size,
+        low_water=max(1, workers) * 2,
+    )
+
+    def search_depth() -> int | None:
+        open_buckets = [b for b in buckets if len(filled[b]) < b.quota]
+        if not open_buckets:
+            return None
+        return max(oracle.max_depth if b.high is None else b.high for b in open_buckets)
+
+    def work() -> None:
+        nonlocal attempts
+        delay = 1.0
+        try:
+            while not done.is_set():
+                with lock:
+                    depth = search_depth()
+                    if depth is None:
+                        done.set()
+                        return
+                    # Candidate pairs tried: taken from the pool or rejected by its goal check.
+                    if attempts + pool.rejected >= max_attempts:
+                        raise RuntimeError(
+                            "Failed to fill every distance bucket. Increase --max-attempts or relax the buckets."
+                        )
+                try:
+                    start, goal = pool.get(timeout=1.0)
+                except TimeoutError:
+                    continue
+                except requests.RequestException:  # pragma: no cover - network path
+                    time.sleep(delay)
+                    delay = min(delay * 1.5, 10)
+                    continue
+                with lock:
+                    attempts += 1
+                    if (start, goal) in seen:
+                        continue
+                    seen.add((start, goal))
+                result = oracle.shortest_path(start, goal, max_depth=depth)
+                if result.distance is None:
+                    continue
+                with lock:
+                    bucket = next((b for b in buckets if b.contains(result.distance)), None)
+                    if bucket is None or len(filled[bucket]) >= bucket.quota:
+                        continue
+                    filled[bucket].append({"start": start, "goal": goal, **result.to_dict()})
+                    progress.put(
+                        f"[{bucket.label}] {len(filled[bucket])}/{bucket.quota}: {start} -> {goal}"
+                        f" (distance {result.distance}, {attempts} tried)"
+                    )
+        except BaseException:
+            done.set()
+            raise
+
+    def report() -> None:
+        while True:
+            try:
+                print(progress.get_nowait())
+            except queue.Empty:
+                return
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="eval-pairs") as executor:
+            futures = [executor.submit(work) for _ in range(max(1, workers))]
+            running = set(futures)
+            while running:
+                _, running = wait(running, timeout=0.2)
+                report()
+            for future in futures:
+                future.result()
+    finally:
+        pool.close()
+
+    return [pair for bucket in buckets for pair in filled[bucket]]
+
+
 def write_pairs(pairs: Iterable[dict[str, str]], output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as fh:
-        yaml.safe_dump(list(pairs), fh, allow_unicode=True, sort_keys=False)
+    save_eval_pairs(pairs, output_path)
 
 
 def main(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv)
     experiment_dir = args.experiment.resolve()
     config = load_config(experiment_dir)
-    client = build_mediawiki_client(config)
+    buckets = parse_buckets(args.buckets) if args.buckets else None
+    if buckets:
+        # Link lists fetched by the oracle persist, so regenerating a set is cheap.
+        client = build_oracle_wiki_client(config, experiment_dir)
+    else:
+        client = build_mediawiki_client(config)
     min_goal_backlinks = (
         args.min_goal_backlinks
         if args.min_goal_backlinks is not None
         else max(0, config.game.min_goal_backlinks)
     )
-    output_path = (args.output or (experiment_dir / "evaluation_pairs.yaml")).resolve()
+    output_path = (args.output or (experiment_dir / PAIRS_FILE)).resolve()
 
-    pairs = generate_pairs(
-        client,
-        args.count,
-        min_goal_backlinks=min_goal_backlinks,
-        max_attempts=max(1, args.max_attempts),
-    )
+    try:
+        if buckets:
+            pairs = generate_stratified_pairs(
+                client,
+                build_oracle(config, client, max_depth=max(1, args.max_depth)),
+                buckets,
+                workers=max(1, args.workers),
+                min_goal_backlinks=min_goal_backlinks,
+                max_attempts=max(1, args.max_attempts),
+                batch_size=config.game.random_batch_size,
+            )
+        else:
+            pairs = generate_pairs(
+                client,
+                args.count,
+                min_goal_backlinks=min_goal_backlinks,
+                max_attempts=max(1, args.max_attempts),
+                batch_size=config.game.random_batch_size,
+            )
+    finally:
+        client.close()
     write_pairs(pairs, output_path)
     print(
         "Wrote {count} pairs for {experiment} -> {output}".format(
@@ -0,0 +1,143 @@
+"""Persistent on-disk cache for page links shared between processes."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    api_url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    payload BLOB,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (api_url, title)
+);
+CREATE INDEX IF NOT EXISTS links_fetched_at ON links (fetched_at);
+"""
+
+
+class LinkCache:
+    """SQLite (WAL mode) store of ``get_links`` results keyed by api_url and title.
+
+    Several ``run``/``evaluate`` processes may point at the same file; SQLite
+    handles the locking and WAL lets readers proceed while one writer commits.
+    A ``None`` result (missing page) is cached as well.
+    """
+
+    EVICT_EVERY = 256
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 200_000,
+    ):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+
+    def get(self, api_url: str, title: str) -> tuple[bool, list[str] | None]:
+        """Return ``(hit, links)``; ``links`` is ``None`` for cached missing pages."""
+        row = self._connection().execute(
+            "SELECT payload, fetched_at FROM links WHERE api_url = ? AND title = ?",
+            (api_url, title),
+        ).fetchone()
+        if row is None:
+            return False, None
+        payload, fetched_at = row
+        if self.ttl_seconds > 0 and time.time() - fetched_at > self.ttl_seconds:
+            return False, None
+        return True, _decode(payload)
+
+    def put(self, api_url: str, title: str, links: list[str] | None) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO links (api_url, title, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (api_url, title, _encode(links), time.time()),
+            )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def put_many(self, api_url: str, results: dict[str, list[str] | None]) -> None:
+        """Store many ``get_links`` results in one transaction."""
+        if not results:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO links (api_url, title, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                [(api_url, title, _encode(links), now) for title, links in results.items()],
+            )
+        with self._writes_lock:
+            before = self._writes
+            self._writes += len(results)
+            due = self._writes // self.EVICT_EVERY > before // self.EVICT_EVERY
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired rows and trim the table to ``max_entries`` (oldest first)."""
+        conn = self._connection()
+        removed = 0
+        with conn:
+            if self.ttl_seconds > 0:
+                cur = conn.execute(
+                    "DELETE FROM links WHERE fetched_at < ?", (time.time() - self.ttl_seconds,)
+                )
+                removed += cur.rowcount
+            if self.max_entries > 0:
+                (count,) = conn.execute("SELECT COUNT(*) FROM links").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    cur = conn.execute(
+                        "DELETE FROM links WHERE rowid IN "
+                        "(SELECT rowid FROM links ORDER BY fetched_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    removed += cur.rowcount
+        return removed
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+
+def _encode(links: list[str] | None) -> bytes | None:
+    if links is None:
+        return None
+    return zlib.compress("\n".join(links).encode("utf-8"))
+
+
+def _decode(payload: bytes | None) -> list[str] | None:
+    if payload is None:
+        return None
+    text = zlib.decompress(payload).decode("utf-8")
+    return text.split("\n") if text else []
@@ -1,107 +1,593 @@
 from __future__ import annotations
 
+import datetime
+import hashlib
+import json
+import threading
 import time
-from dataclasses import dataclass
-from typing import Any, List
-
-from openai import OpenAI
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, List
 
 from .config import LLMConfig
+from .ratelimit import estimate_tokens, get_scheduler
+
+# Provider SDKs are slow to import, so they are loaded by the client that uses
+# them; commands like eval-stats never pay for them.
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 
 @dataclass
 class LLMResult:
     text: str
     usage: dict[str, Any]
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class LLMRequest:
+    """Arguments of one ``generate`` call, used to submit requests in batches."""
+
+    messages: List[dict[str, str]]
+    cache_prefix: str | None = None
+    stop_when: Callable[[str], bool] | None = None
 
 
 class BaseLLMClient:
     def __init__(self, config: LLMConfig):
         self.config = config
+        self.scheduler = get_scheduler(config)
+
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """Generate the next assistant message.
 
-    def generate(self, messages: List[dict[str, str]], **kwargs: Any) -> LLMResult:
+        ``cache_prefix`` marks a leading part of the first message that is
+        identical across requests; clients with ``prompt_cache`` enabled ask
+        the provider to cache it. With ``stream`` enabled, generation is
+        cancelled as soon as ``stop_when`` accepts the text received so far.
+        """
         raise NotImplementedError
 
+    def generate_batch(self, requests: List[LLMRequest]) -> List[LLMResult]:
+        """Answer independent requests; results are returned in request order.
+
+        Clients without a batch endpoint simply answer them one by one.
+        """
+        return [
+            self.generate(r.messages, cache_prefix=r.cache_prefix, stop_when=r.stop_when)
+            for r in requests
+        ]
+
 
 class OpenRouterClient(BaseLLMClient):
     def __init__(self, config: LLMConfig, api_key: str):
+        from openai import OpenAI
+
         super().__init__(config)
         base_url = config.base_url or "https://openrouter.ai/api/v1"
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # Retries are handled by the shared scheduler so all games back off together.
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        # OpenAI-style endpoints cache prefixes automatically; OpenRouter also
+        # forwards explicit cache_control breakpoints to providers that need them.
+        self._supports_cache_control = "openrouter.ai" in base_url
 
-    def generate(self, messages: List[dict[str, str]], **kwargs: Any) -> LLMResult:
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
         request_options = {k: v for k, v in (self.config.options or {}).items()}
         if "max_output_tokens" in request_options and "max_tokens" not in request_options:
             request_options["max_tokens"] = request_options.pop("max_output_tokens")
-        response = self.client.chat.completions.create(
+        request_messages: list[dict[str, Any]] = list(messages)
+        if self.config.prompt_cache and self._supports_cache_control:
+            request_messages = _mark_cache_prefix(request_messages, cache_prefix)
+        if self.config.stream:
+            return self.scheduler.call(
+                lambda: self._stream(request_messages, request_options, kwargs, stop_when),
+                estimated_tokens=estimate_tokens(messages),
+                classify=_classify_openai_error,
+                usage_tokens=_result_tokens,
+            )
+        started = time.perf_counter()
+        response = self.scheduler.call(
+            lambda: self.client.chat.completions.create(
+                model=self.config.model,
+                messages=request_messages,
+                timeout=self.config.timeout,
+                **request_options,
+                **kwargs,
+            ),
+            estimated_tokens=estimate_tokens(messages),
+            classify=_classify_openai_error,
+            usage_tokens=lambda r: getattr(r.usage, "total_tokens", None),
+        )
+        choice = response.choices[0]
+        text = choice.message.content or ""
+        usage = self._usage(response.usage)
+        return LLMResult(
+            text=text.strip(), usage=usage, timings={"latency": time.perf_counter() - started}
+        )
+
+    def _stream(
+        self,
+        request_messages: list[dict[str, Any]],
+        request_options: dict[str, Any],
+        kwargs: dict[str, Any],
+        stop_when: Callable[[str], bool] | None,
+    ) -> LLMResult:
+        started = time.perf_counter()
+        stream = self.client.chat.completions.create(
             model=self.config.model,
-            messages=messages,
+            messages=request_messages,
             timeout=self.config.timeout,
+            stream=True,
+            stream_options={"include_usage": True},
             **request_options,
             **kwargs,
         )
-        choice = response.choices[0]
-        text = choice.message.content or ""
+        timings: dict[str, float] = {}
+        text = ""
+        usage: dict[str, Any] | None = None
+        stopped = False
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = self._usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if not delta:
+                    continue
+                timings.setdefault("time_to_first_token", time.perf_counter() - started)
+                text += delta
+                if stop_when is not None and stop_when(text):
+                    timings["time_to_move"] = time.perf_counter() - started
+                    stopped = True
+                    break
+        finally:
+            stream.close()
+        timings["latency"] = time.perf_counter() - started
+        _record_final_move(timings, text, stop_when)
+        if usage is None:
+            # Usage only arrives with the final chunk, which a cancelled stream never sees.
+            usage = {"input_tokens": None, "output_tokens": None}
+        if stopped:
+            usage["streams_stopped_early"] = 1
+        return LLMResult(text=text.strip(), usage=usage, timings=timings)
+
+    def _usage(self, response_usage: Any) -> dict[str, Any]:
         usage = {
-            "input_tokens": getattr(response.usage, "prompt_tokens", None),
-            "output_tokens": getattr(response.usage, "completion_tokens", None),
+            "input_tokens": getattr(response_usage, "prompt_tokens", None),
+            "output_tokens": getattr(response_usage, "completion_tokens", None),
         }
-        return LLMResult(text=text.strip(), usage=usage)
+        if self.config.prompt_cache:
+            details = getattr(response_usage, "prompt_tokens_details", None)
+            usage.update(_cache_usage(getattr(details, "cached_tokens", None)))
+        return usage
 
 
 class GeminiClient(BaseLLMClient):
     def __init__(self, config: LLMConfig, api_key: str):
+        import google.generativeai as genai
+
         super().__init__(config)
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(
             config.model,
             generation_config=config.options or None,
         )
-        self.max_retries = 6
+        # prefix hash -> (model bound to its CachedContent or None if caching was
+        # refused, monotonic time after which the entry must be recreated)
+        self._cached_models: dict[str, tuple[genai.GenerativeModel | None, float]] = {}
+        # prefix hash -> CachedContent creation in flight, so each prefix is created once
+        self._cache_creations: dict[str, Future[genai.GenerativeModel | None]] = {}
+        self._cache_lock = threading.Lock()
 
-    def generate(self, messages: List[dict[str, str]], **kwargs: Any) -> LLMResult:
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
         contents = []
         role_map = {"system": "user", "assistant": "model"}
         for msg in messages:
             role = role_map.get(msg["role"], msg["role"])
             contents.append({"role": role, "parts": [msg["content"]]})
-        last_error: Exception | None = None
-        response = None
-        for attempt in range(self.max_retries):
-            try:
-                response = self.model.generate_content(contents)
-                last_error = None
-                break
-            except google_exceptions.ResourceExhausted as exc:
-                last_error = exc
-                delay = getattr(exc, "retry_delay", None)
-                sleep_seconds = 10 * (attempt + 1)
-                if delay is not None:
-                    sleep_seconds = max(
-                        sleep_seconds,
-                        getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1_000_000_000,
-                    )
-                time.sleep(sleep_seconds)
-            except google_exceptions.GoogleAPICallError as exc:
-                last_error = exc
-                time.sleep(2 * (attempt + 1))
-        if response is None:
-            raise last_error or RuntimeError("Gemini generate_content failed")
+        if self.config.prompt_cache and cache_prefix and contents:
+            first = messages[0]["content"]
+            cached_model = self._cached_model(cache_prefix) if first.startswith(cache_prefix) else None
+            if cached_model is not None:
+                rest = first[len(cache_prefix) :].lstrip("\n")
+                cached_contents = [{"role": "user", "parts": [rest]}, *contents[1:]]
+                try:
+                    return self._send(cached_model, cached_contents, messages, stop_when)
+                except Exception as exc:
+                    if not _is_gone_gemini_cache(exc):
+                        raise
+                    # The CachedContent expired or was deleted server-side: forget it
+                    # and answer this request without the cache.
+                    self._drop_cached_model(cache_prefix)
+        return self._send(self.model, contents, messages, stop_when)
+
+    def _send(
+        self,
+        model: genai.GenerativeModel,
+        contents: list[dict[str, Any]],
+        messages: List[dict[str, str]],
+        stop_when: Callable[[str], bool] | None,
+    ) -> LLMResult:
+        if self.config.stream:
+            return self.scheduler.call(
+                lambda: self._stream(model, contents, stop_when),
+                estimated_tokens=estimate_tokens(messages),
+                classify=_classify_gemini_error,
+                usage_tokens=_result_tokens,
+            )
+        started = time.perf_counter()
+        response = self.scheduler.call(
+            lambda: model.generate_content(contents),
+            estimated_tokens=estimate_tokens(messages),
+            classify=_classify_gemini_error,
+            usage_tokens=lambda r: getattr(r.usage_metadata, "total_token_count", None),
+        )
         text = response.text or ""
+        usage = self._usage(response.usage_metadata)
+        return LLMResult(
+            text=text.strip(), usage=usage, timings={"latency": time.perf_counter() - started}
+        )
+
+    def _stream(
+        self,
+        model: genai.GenerativeModel,
+        contents: list[dict[str, Any]],
+        stop_when: Callable[[str], bool] | None,
+    ) -> LLMResult:
+        started = time.perf_counter()
+        response = model.generate_content(contents, stream=True)
+        timings: dict[str, float] = {}
+        text = ""
+        usage_metadata = None
+        stopped = False
+        chunks = iter(response)
+        try:
+            for chunk in chunks:
+                usage_metadata = getattr(chunk, "usage_metadata", None) or usage_metadata
+                delta = chunk.text if chunk.parts else ""
+                if not delta:
+                    continue
+                timings.setdefault("time_to_first_token", time.perf_counter() - started)
+                text += delta
+                if stop_when is not None and stop_when(text):
+                    timings["time_to_move"] = time.perf_counter() - started
+                    stopped = True
+                    break
+        finally:
+            chunks.close()
+            _close_gemini_stream(response)
+        timings["latency"] = time.perf_counter() - started
+        _record_final_move(timings, text, stop_when)
+        usage = self._usage(usage_metadata)
+        if stopped:
+            usage["streams_stopped_early"] = 1
+        return LLMResult(text=text.strip(), usage=usage, timings=timings)
+
+    def _usage(self, usage_metadata: Any) -> dict[str, Any]:
         usage = {
-            "input_tokens": getattr(response.usage_metadata, "prompt_token_count", None),
-            "output_tokens": getattr(response.usage_metadata, "candidates_token_count", None),
+            "input_tokens": getattr(usage_metadata, "prompt_token_count", None),
+            "output_tokens": getattr(usage_metadata, "candidates_token_count", None),
         }
-        return LLMResult(text=text.strip(), usage=usage)
+        if self.config.prompt_cache:
+            usage.update(_cache_usage(getattr(usage_metadata, "cached_content_token_count", None)))
+        return usage
+
+    def _cached_model(self, prefix: str) -> genai.GenerativeModel | None:
+        import google.generativeai as genai
+        from google.api_core import exceptions as google_exceptions
+
+        key = _prefix_key(prefix)
+        with self._cache_lock:
+            entry = self._cached_models.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+            creation = self._cache_creations.get(key)
+            if creation is None:
+                creation = self._cache_creations[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            # Another worker is creating this prefix's cache; others are not blocked.
+            return creation.result()
+
+        ttl = self.config.prompt_cache_ttl
+        try:
+            try:
+                cached = genai.caching.CachedContent.create(
+                    model=self.config.model,
+                    display_name=f"ai-wiki-golf-{key[:16]}",
+                    contents=[{"role": "user", "parts": [prefix]}],
+                    ttl=datetime.timedelta(seconds=ttl),
+                )
+                model: genai.GenerativeModel | None = genai.GenerativeModel.from_cached_content(
+                    cached, generation_config=self.config.options or None
+                )
+            except google_exceptions.GoogleAPICallError:
+                # Typically the prefix is below the model's minimum cacheable size.
+                model = None
+        except BaseException as exc:
+            with self._cache_lock:
+                self._cache_creations.pop(key, None)
+            creation.set_exception(exc)
+            raise
+        with self._cache_lock:
+            # Recreate a little before the server-side TTL runs out so no request
+            # is sent against an expired cache.
+            self._cached_models[key] = (model, time.monotonic() + ttl - min(60.0, ttl / 10))
+            self._cache_creations.pop(key, None)
+        creation.set_result(model)
+        return model
+
+    def _drop_cached_model(self, prefix: str) -> None:
+        with self._cache_lock:
+            self._cached_models.pop(_prefix_key(prefix), None)
+
+
+class OpenAIBatchClient(BaseLLMClient):
+    """OpenAI-compatible Batch API client (``/files`` + ``/batches``).
+
+    Each ``generate_batch`` call uploads one JSONL file and polls until the
+    batch finishes, so it trades latency for throughput and price. Streaming
+    and ``stop_when`` do not apply to batches. Requests that fail inside a
+    batch (or are left over when it expires) are sent again one by one to the
+    chat-completions route of the same endpoint.
+    """
+
+    _FINISHED = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, config: LLMConfig, api_key: str):
+        from openai import OpenAI
+
+        super().__init__(config)
+        base_url = config.batch_base_url or config.base_url
+        if not base_url:
+            # Never guess an endpoint: the key may be an OpenRouter key.
+            raise ValueError("Batch mode requires llm.batch_base_url (or llm.base_url) to be set")
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=config.timeout)
+        self._base_url = base_url
+        self._api_key = api_key
+        self._fallback: OpenRouterClient | None = None
+
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        return self.generate_batch([LLMRequest(messages, cache_prefix, stop_when)])[0]
+
+    def generate_batch(self, requests: List[LLMRequest]) -> List[LLMResult]:
+        if not requests:
+            return []
+        options = dict(self.config.options or {})
+        if "max_output_tokens" in options and "max_tokens" not in options:
+            options["max_tokens"] = options.pop("max_output_tokens")
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": str(idx),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": self.config.model, "messages": request.messages, **options},
+                },
+                ensure_ascii=False,
+            )
+            for idx, request in enumerate(requests)
+        ]
+        started = time.perf_counter()
+        upload = self.client.files.create(
+            file=("requests.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        while batch.status not in self._FINISHED:
+            time.sleep(self.config.batch_poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status not in ("completed", "expired"):
+            raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+        latency = time.perf_counter() - started
+
+        results: dict[str, LLMResult] = {}
+        for record in self._read_output(batch.output_file_id):
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                continue
+            body = response["body"]
+            usage = body.get("usage") or {}
+            results[record["custom_id"]] = LLMResult(
+                text=(body["choices"][0]["message"].get("content") or "").strip(),
+                usage={
+                    "input_tokens": usage.get("prompt_tokens"),
+                    "output_tokens": usage.get("completion_tokens"),
+                    "batch_requests": 1,
+                },
+                timings={"latency": latency},
+            )
+        return [
+            results.get(str(idx)) or self._resend(request) for idx, request in enumerate(requests)
+        ]
+
+    def _resend(self, request: LLMRequest) -> LLMResult:
+        if self._fallback is None:
+            # Same endpoint and key as the batch; never the OpenRouter default.
+            self._fallback = OpenRouterClient(
+                replace(self.config, base_url=self._base_url, stream=False), self._api_key
+            )
+        result = self._fallback.generate(
+            request.messages, cache_prefix=request.cache_prefix, stop_when=request.stop_when
+        )
+        result.usage["batch_fallbacks"] = 1
+        return result
+
+    def _read_output(self, file_id: str | None) -> list[dict[str, Any]]:
+        if not file_id:
+            return []
+        content = self.client.files.content(file_id).text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def _mark_cache_prefix(
+    messages: list[dict[str, Any]], cache_prefix: str | None
+) -> list[dict[str, Any]]:
+    """Split the first message so the stable prefix carries a cache breakpoint."""
+    if not cache_prefix or not messages:
+        return messages
+    first = messages[0]
+    content = first["content"]
+    if not isinstance(content, str) or not content.startswith(cache_prefix):
+        return messages
+    parts: list[dict[str, Any]] = [
+        {"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}}
+    ]
+    if rest := content[len(cache_prefix) :]:
+        parts.append({"type": "text", "text": rest})
+    return [{"role": first["role"], "content": parts}, *messages[1:]]
+
+
+def _result_tokens(result: LLMResult) -> int | None:
+    input_tokens = result.usage.get("input_tokens")
+    output_tokens = result.usage.get("output_tokens")
+    if input_tokens is None and output_tokens is None:
+        return None
+    return (input_tokens or 0) + (output_tokens or 0)
+
+
+def _cache_usage(cached_tokens: int | None) -> dict[str, int]:
+    cached = cached_tokens or 0
+    return {
+        "cached_input_tokens": cached,
+        "prompt_cache_hits": 1 if cached else 0,
+        "prompt_cache_misses": 0 if cached else 1,
+    }
+
+
+def _classify_openai_error(exc: Exception) -> tuple[bool, float | None] | None:
+    import openai
+
+    if isinstance(exc, openai.RateLimitError):
+        return True, _retry_after_header(exc.response.headers)
+    if isinstance(exc, openai.InternalServerError):
+        return False, _retry_after_header(exc.response.headers)
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return False, None
+    return None
+
+
+def _classify_gemini_error(exc: Exception) -> tuple[bool, float | None] | None:
+    from google.api_core import exceptions as google_exceptions
+
+    if _is_gone_gemini_cache(exc):
+        # Retrying cannot bring back a missing cache; GeminiClient falls back instead.
+        return None
+    if isinstance(exc, google_exceptions.ResourceExhausted):
+        delay = getattr(exc, "retry_delay", None)
+        retry_after = None
+        if delay is not None:
+            retry_after = getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1_000_000_000
+        return True, retry_after
+    if isinstance(exc, google_exceptions.GoogleAPICallError):
+        return False, None
+    return None
+
+
+def _is_gone_gemini_cache(exc: Exception) -> bool:
+    from google.api_core import exceptions as google_exceptions
+
+    return isinstance(exc, (google_exceptions.NotFound, google_exceptions.PermissionDenied))
+
+
+def _record_final_move(
+    timings: dict[str, float], text: str, stop_when: Callable[[str], bool] | None
+) -> None:
+    """A move line that ends the reply has no newline; the end of the stream completes it."""
+    if stop_when is not None and "time_to_move" not in timings and stop_when(text + "\n"):
+        timings["time_to_move"] = timings["latency"]
+
+
+def _close_gemini_stream(response: Any) -> None:
+    """Cancel the server stream behind a (possibly partly read) streaming response."""
+    # GenerateContentResponse has no public close(); its wrapped gRPC/REST
+    # iterator is cancelled directly, as the OpenAI path closes its stream.
+    iterator = getattr(response, "_iterator", None)
+    for name in ("cancel", "close"):
+        method = getattr(iterator, name, None)
+        if callable(method):
+            method()
+            return
+
+
+def _prefix_key(prefix: str) -> str:
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+def _retry_after_header(headers: Any) -> float | None:
+    value = headers.get("retry-after") if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def build_llm_client(
+    config: LLMConfig,
+    env: dict[str, str],
+    base_dir: Path | None = None,
+    *,
+    batch: bool = False,
+) -> BaseLLMClient:
+    if config.cache_mode == "off":
+        return _build_provider_client(config, env, batch)
+    from .llm_cache import CachingLLMClient
+
+    cache_dir = Path(config.cache_dir).expanduser()
+    if not cache_dir.is_absolute() and base_dir is not None:
+        cache_dir = base_dir / cache_dir
+    # Replaying never calls the provider, so it must work without API keys.
+    inner = None if config.cache_mode == "replay" else _build_provider_client(config, env, batch)
+    return CachingLLMClient(config, inner, cache_dir, config.cache_mode)
 
 
-def build_llm_client(config: LLMConfig, env: dict[str, str]) -> BaseLLMClient:
+def _build_provider_client(
+    config: LLMConfig, env: dict[str, str], batch: bool = False
+) -> BaseLLMClient:
+    if batch and config.provider != "openrouter":
+        raise ValueError("Batch mode requires an OpenAI-compatible provider (openrouter)")
     if config.provider == "openrouter":
         api_key = env.get("OPENROUTER_API_KEY") or env.get("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENROUTER_API_KEY or OPENAI_API_KEY is required for OpenRouter provider")
+        if batch:
+            return OpenAIBatchClient(config, api_key)
         return OpenRouterClient(config, api_key)
     if config.provider == "gemini":
         api_key = env.get("GEMINI_API_KEY")
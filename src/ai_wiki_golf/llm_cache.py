@@ -0,0 +1,126 @@
+"""Deterministic on-disk record/replay cache for LLM responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Callable, List
+
+from .config import LLMConfig
+from .llm import BaseLLMClient, LLMRequest, LLMResult
+from .log_store import write_atomic
+
+# Token counts of a replayed response are kept under ``replayed_<key>`` so
+# they are not reported as spent.
+TOKEN_KEYS = ("input_tokens", "output_tokens", "cached_input_tokens")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class CachingLLMClient(BaseLLMClient):
+    """Wrap another client and store each response under a hash of its request.
+
+    Modes (``llm.cache_mode``):
+
+    - ``record``: always call the provider and overwrite the stored response.
+    - ``replay``: only serve stored responses; no provider (or API key) needed.
+    - ``record-missing``: serve stored responses and record the rest.
+    """
+
+    MODES = ("record", "replay", "record-missing")
+
+    def __init__(
+        self,
+        config: LLMConfig,
+        inner: BaseLLMClient | None,
+        cache_dir: Path,
+        mode: str,
+    ):
+        super().__init__(config)
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        if inner is None and mode != "replay":
+            raise ValueError(f"LLM cache mode '{mode}' requires a provider client")
+        self.inner = inner
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def generate(
+        self,
+        messages: List[dict[str, str]],
+        *,
+        cache_prefix: str | None = None,
+        stop_when: Callable[[str], bool] | None = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        key = request_key(self.config, messages, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        assert self.inner is not None
+        result = self.inner.generate(
+            messages, cache_prefix=cache_prefix, stop_when=stop_when, **kwargs
+        )
+        self._store(key, messages, result)
+        return result
+
+    def generate_batch(self, requests: List[LLMRequest]) -> List[LLMResult]:
+        keys = [request_key(self.config, r.messages, {}) for r in requests]
+        results: list[LLMResult | None] = [self._lookup(key) for key in keys]
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        if missing:
+            assert self.inner is not None
+            fresh = self.inner.generate_batch([requests[idx] for idx in missing])
+            for idx, result in zip(missing, fresh):
+                self._store(keys[idx], requests[idx].messages, result)
+                results[idx] = result
+        return [result for result in results if result is not None]
+
+    def _lookup(self, key: str) -> LLMResult | None:
+        path = self._path(key)
+        if self.mode != "record" and path.exists():
+            record = json.loads(path.read_text(encoding="utf-8"))
+            usage = {
+                (f"replayed_{name}" if name in TOKEN_KEYS else name): value
+                for name, value in record["usage"].items()
+            }
+            usage["llm_cache_hits"] = 1
+            return LLMResult(text=record["text"], usage=usage)
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded LLM response for request {key}")
+        return None
+
+    def _store(self, key: str, messages: List[dict[str, str]], result: LLMResult) -> None:
+        record = {
+            "model": self.config.model,
+            "messages": messages,
+            "text": result.text,
+            "usage": result.usage,
+        }
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(record, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+
+def request_key(config: LLMConfig, messages: List[dict[str, str]], kwargs: dict[str, Any]) -> str:
+    """Stable hash of everything that determines the provider's response."""
+    payload = {
+        "provider": config.provider,
+        "model": config.model,
+        "base_url": config.base_url,
+        "options": config.options or {},
+        # Streaming stops at the move line, so it changes the recorded text.
+        "stream": config.stream,
+        "messages": messages,
+        "kwargs": kwargs,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
@@ -0,0 +1,242 @@
+"""Compact game log store with a summary index.
+
+``log_format: compact`` writes each game to ``<name>.json.gz`` instead of
+``<name>.yaml``. The config and every candidate list are stored once under
+``blobs/`` by content hash, and ``index.jsonl`` keeps one summary line per
+game (start, goal, score, steps, book_index) so overviews never have to open
+the logs themselves. Directories may mix YAML and compact logs; the readers
+below handle both.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - depends on how PyYAML was built
+    from yaml import SafeLoader as _YamlLoader
+
+COMPACT_SUFFIX = ".json.gz"
+INDEX_NAME = "index.jsonl"
+SUMMARY_CACHE_NAME = ".summaries.json"
+# Bump when summarize_log changes so cached summaries are recomputed.
+SUMMARY_VERSION = 2
+# Below this many changed YAML logs, parsing in-process beats starting workers.
+PARALLEL_PARSE_MIN = 64
+_BLOB_KEY = "$blob"
+_INDEX_LOCK = threading.Lock()
+
+
+def write_log(log_dir: Path, name: str, payload: dict[str, Any], log_format: str = "yaml") -> Path:
+    """Write one game log (as built by ``_build_log_payload``) in the configured format."""
+    if log_format == "yaml":
+        path = log_dir / f"{name}.yaml"
+        write_atomic(path, yaml.safe_dump(payload, allow_unicode=True).encode("utf-8"))
+        return path
+    if log_format != "compact":
+        raise ValueError(f"Unknown log_format: {log_format}")
+    path = log_dir / f"{name}{COMPACT_SUFFIX}"
+    record = dict(payload)
+    if "config" in record:
+        record["config"] = _put_blob(log_dir, record["config"])
+    game = dict(record.get("game") or {})
+    game["history"] = [
+        {**step, "candidates": _put_blob(log_dir, step.get("candidates") or [])}
+        for step in game.get("history") or []
+    ]
+    record["game"] = game
+    write_atomic(path, gzip.compress(_dumps(record).encode("utf-8")))
+    summary = {"name": path.name, **summarize_log(payload)}
+    with _INDEX_LOCK, (log_dir / INDEX_NAME).open("a", encoding="utf-8") as fh:
+        fh.write(_dumps(summary) + "\n")
+    return path
+
+
+def log_exists(log_dir: Path, name: str) -> bool:
+    return (log_dir / f"{name}.yaml").exists() or (log_dir / f"{name}{COMPACT_SUFFIX}").exists()
+
+
+def read_log(log_dir: Path, file_name: str) -> dict[str, Any] | None:
+    """Load a log by file name (``*.yaml`` or ``*.json.gz``) with blobs expanded.
+
+    Returns ``None`` for a log that cannot be parsed.
+    """
+    path = log_dir / file_name
+    if file_name.endswith(COMPACT_SUFFIX):
+        try:
+            record = json.loads(gzip.decompress(path.read_bytes()))
+        except (EOFError, OSError, ValueError):
+            return None
+        if not isinstance(record, dict):
+            return None
+        if isinstance(record.get("config"), dict) and _BLOB_KEY in record["config"]:
+            record["config"] = _get_blob(log_dir, record["config"])
+        for step in (record.get("game") or {}).get("history") or []:
+            if isinstance(step.get("candidates"), dict):
+                step["candidates"] = _get_blob(log_dir, step["candidates"])
+        return record
+    try:
+        data = yaml.load(path.read_text(encoding="utf-8"), Loader=_YamlLoader) or {}
+    except yaml.YAMLError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def log_files(log_dir: Path) -> list[str]:
+    """File names of all logs in ``log_dir``, sorted; a compact log wins over its YAML copy."""
+    if not log_dir.exists():
+        return []
+    names = {p.name[: -len(COMPACT_SUFFIX)]: p.name for p in log_dir.glob(f"*{COMPACT_SUFFIX}")}
+    for path in log_dir.glob("*.yaml"):
+        names.setdefault(path.stem, path.name)
+    return sorted(names.values())
+
+
+def iter_logs(log_dir: Path) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(file name, log)`` for every readable log."""
+    for file_name in log_files(log_dir):
+        data = read_log(log_dir, file_name)
+        if data is not None:
+            yield file_name, data
+
+
+def read_summaries(log_dir: Path) -> list[dict[str, Any]]:
+    """Summary rows for every log.
+
+    Compact logs come from the index. YAML logs are summarised once and the
+    result is kept in ``.summaries.json`` keyed by file name, mtime and size,
+    so only new or changed files are parsed (in worker processes when many
+    changed at once). Unreadable logs get a ``{"broken": True}`` row, which
+    callers skip.
+    """
+    indexed: dict[str, dict[str, Any]] = {}
+    index_path = log_dir / INDEX_NAME
+    if index_path.exists():
+        with index_path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                indexed[entry["name"]] = entry
+
+    cache = _load_summary_cache(log_dir)
+    fresh_cache: dict[str, dict[str, Any]] = {}
+    rows: dict[str, dict[str, Any]] = {}
+    stale: list[str] = []
+    for file_name in log_files(log_dir):
+        if file_name in indexed:
+            rows[file_name] = indexed[file_name]
+            continue
+        stat = (log_dir / file_name).stat()
+        key = [stat.st_mtime_ns, stat.st_size, SUMMARY_VERSION]
+        cached = cache.get(file_name)
+        if cached is not None and cached.get("key") == key:
+            fresh_cache[file_name] = cached
+            rows[file_name] = {"name": file_name, **cached["summary"]}
+        else:
+            fresh_cache[file_name] = {"key": key}
+            stale.append(file_name)
+
+    paths = [str(log_dir / file_name) for file_name in stale]
+    if len(paths) >= PARALLEL_PARSE_MIN:
+        with ProcessPoolExecutor() as executor:
+            summaries = list(executor.map(_summarize_file, paths, chunksize=32))
+    else:
+        summaries = [_summarize_file(path) for path in paths]
+    for file_name, summary in zip(stale, summaries):
+        fresh_cache[file_name]["summary"] = summary
+        rows[file_name] = {"name": file_name, **summary}
+
+    if stale or fresh_cache.keys() != cache.keys():
+        try:
+            write_atomic(log_dir / SUMMARY_CACHE_NAME, json.dumps(fresh_cache).encode("utf-8"))
+        except OSError:
+            pass  # Read-only log directories still work, just without the cache.
+    return [rows[name] for name in sorted(rows)]
+
+
+def summarize_log(payload: dict[str, Any]) -> dict[str, Any]:
+    game = payload.get("game") or {}
+    return {
+        "start": game.get("start"),
+        "goal": game.get("goal"),
+        "score": game.get("score"),
+        "steps": len(game.get("history") or []),
+        "book_index": payload.get("book_index"),
+        "distance": (payload.get("pair") or {}).get("distance"),
+    }
+
+
+def _summarize_file(path: str) -> dict[str, Any]:
+    file_path = Path(path)
+    data = read_log(file_path.parent, file_path.name)
+    return {"broken": True} if data is None else summarize_log(data)
+
+
+def _load_summary_cache(log_dir: Path) -> dict[str, dict[str, Any]]:
+    try:
+        cache = json.loads((log_dir / SUMMARY_CACHE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def convert_yaml_logs(log_dir: Path, *, remove: bool = False) -> int:
+    """Rewrite the YAML logs in ``log_dir`` as compact logs; returns the number converted."""
+    converted = 0
+    for yaml_path in sorted(log_dir.glob("*.yaml")):
+        try:
+            payload = yaml.load(yaml_path.read_text(encoding="utf-8"), Loader=_YamlLoader)
+        except yaml.YAMLError:
+            continue
+        if not isinstance(payload, dict):
+            continue
+        write_log(log_dir, yaml_path.stem, payload, "compact")
+        if remove:
+            yaml_path.unlink()
+        converted += 1
+    return converted
+
+
+def _put_blob(log_dir: Path, value: Any) -> dict[str, str]:
+    encoded = _dumps(value).encode("utf-8")
+    digest = hashlib.sha256(encoded).hexdigest()
+    path = log_dir / "blobs" / digest[:2] / f"{digest}.json.gz"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, gzip.compress(encoded))
+    return {_BLOB_KEY: digest}
+
+
+def _get_blob(log_dir: Path, ref: dict[str, str]) -> Any:
+    digest = ref[_BLOB_KEY]
+    path = log_dir / "blobs" / digest[:2] / f"{digest}.json.gz"
+    return json.loads(gzip.decompress(path.read_bytes()))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temporary file so readers never see a partial file."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
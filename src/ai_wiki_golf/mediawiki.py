@@ -1,98 +1,195 @@
 from __future__ import annotations
 
+import threading
+import time
 from collections import defaultdict
-from typing import Optional
+from typing import Any, Iterable, Optional, Protocol
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import WikiConfig
+from .link_cache import LinkCache
 
 HEADERS = {
     "User-Agent": "ai-wiki-golf/0.1 (contact: select766@outlook.jp)",
+    "Accept-Encoding": "gzip, deflate",
 }
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_TITLES_PER_QUERY = 50
+# Backlink lists share the link cache under this suffix of the API URL.
+BACKLINKS_CACHE_SUFFIX = "#linkshere-all"
+
+
+class WikiClient(Protocol):
+    """Queries every wiki backend answers (API, dump, synthetic)."""
+
+    def get_random_pages(self, limit: int = 1) -> list[str]: ...
+
+    def get_page_abstract(self, title: str) -> Optional[str]: ...
+
+    def get_links(self, title: str) -> Optional[list[str]]: ...
+
+    def get_links_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]: ...
+
+    def get_backlinks_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]: ...
+
+    def get_backlink_count(self, title: str) -> int: ...
+
+    def has_at_least_backlinks(self, title: str, n: int) -> bool: ...
+
+    def has_at_least_backlinks_many(self, titles: Iterable[str], n: int) -> dict[str, bool]: ...
+
+    def close(self) -> None: ...
+
+
+class RequestSpacer:
+    """Space request starts at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float | None):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
 
 
 class MediaWikiClient:
-    def __init__(self, api_url: str):
+    def __init__(
+        self,
+        api_url: str,
+        cache: LinkCache | None = None,
+        *,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 30,
+        requests_per_second: float | None = None,
+    ):
         self.api_url = api_url
+        self.cache = cache
+        self.timeout = timeout
+        self.spacer = RequestSpacer(requests_per_second)
+        self.session = _build_session(pool_maxsize, max_retries, backoff_factor)
+        # title -> (known backlink count, whether the count is exact)
+        self._backlink_counts: dict[str, tuple[int, bool]] = {}
+        self._backlink_lock = threading.Lock()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _query(self, params: dict[str, Any]) -> dict[str, Any]:
+        self.spacer.acquire()
+        resp = self.session.get(self.api_url, params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
 
     def get_random_pages(self, limit: int = 1) -> list[str]:
-        resp = requests.get(
-            self.api_url,
-            {
-                "action": "query",
-                "format": "json",
-                "list": "random",
-                "rnlimit": limit,
-                "rnnamespace": 0,
-            },
-            headers=HEADERS,
-            timeout=30,
-        )
-        result = resp.json()
-        pages = [p["title"] for p in result["query"]["random"]]
-        return pages
+        result = self._query(_random_query(limit))
+        return _parse_random(result)
 
     def get_page_abstract(self, title: str) -> Optional[str]:
-        resp = requests.get(
-            self.api_url,
-            {
-                "action": "query",
-                "format": "json",
-                "prop": "extracts",
-                "titles": [title],
-                "exchars": 1000,
-                "exintro": True,
-                "explaintext": True,
-            },
-            headers=HEADERS,
-            timeout=30,
-        )
-        result = resp.json()
-        for _, page_info in result["query"]["pages"].items():
-            if page_info["title"] == title:
-                return page_info.get("extract")
-        return None
+        result = self._query(_abstract_query(title))
+        return _parse_abstract(result, title)
 
     def get_links(self, title: str) -> Optional[list[str]]:
-        query = {
-            "action": "query",
-            "format": "json",
-            "prop": "links",
-            "titles": [title],
-            "pllimit": 500,
-            "plnamespace": 0,
-        }
-        page_links = defaultdict(list)
-        while True:
-            resp = requests.get(self.api_url, query, headers=HEADERS, timeout=30)
-            result = resp.json()
-            for _, page_info in result.get("query", {}).get("pages", {}).items():
-                if "missing" in page_info:
-                    return None
-                links = page_info.get("links", [])
-                if not links:
+        if self.cache is not None:
+            hit, cached = self.cache.get(self.api_url, title)
+            if hit:
+                return cached
+        links = self._fetch_links(title)
+        if self.cache is not None:
+            self.cache.put(self.api_url, title, links)
+        return links
+
+    def get_links_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        """Fetch links for many pages; missing pages map to ``None``."""
+        results: dict[str, Optional[list[str]]] = {}
+        pending: list[str] = []
+        for title in dict.fromkeys(titles):
+            if self.cache is not None:
+                hit, cached = self.cache.get(self.api_url, title)
+                if hit:
+                    results[title] = cached
+                    continue
+            pending.append(title)
+        for start in range(0, len(pending), MAX_TITLES_PER_QUERY):
+            batch = pending[start : start + MAX_TITLES_PER_QUERY]
+            fetched = self._fetch_links_batch(batch)
+            if self.cache is not None:
+                self.cache.put_many(self.api_url, fetched)
+            results.update(fetched)
+        return results
+
+    def get_backlinks_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        """Pages linking to each title; missing pages map to ``None``.
+
+        Redirect pages are included: ``get_links`` returns link titles as
+        written, so a redirect is a page of its own on the forward side too.
+        """
+        cache_key = self.api_url + BACKLINKS_CACHE_SUFFIX
+        results: dict[str, Optional[list[str]]] = {}
+        pending: list[str] = []
+        for title in dict.fromkeys(titles):
+            if self.cache is not None:
+                hit, cached = self.cache.get(cache_key, title)
+                if hit:
+                    results[title] = cached
                     continue
-                page_links[page_info["title"].strip()].extend(
-                    [p["title"].strip() for p in links if "title" in p]
-                )
+            pending.append(title)
+        for start in range(0, len(pending), MAX_TITLES_PER_QUERY):
+            batch = pending[start : start + MAX_TITLES_PER_QUERY]
+            query = _linkshere_query(batch)
+            query.update(lhprop="title", lhlimit="max")
+            collector = _LinkCollector(batch, prop="linkshere")
+            while True:
+                result = self._query(query)
+                collector.add(result)
+                if cont := result.get("continue"):
+                    query.update(cont)
+                else:
+                    break
+            fetched = collector.results()
+            for title, backlinks in fetched.items():
+                if backlinks is not None:
+                    self._record_backlinks(title, len(backlinks), exact=True)
+            if self.cache is not None:
+                self.cache.put_many(cache_key, fetched)
+            results.update(fetched)
+        return results
+
+    def _fetch_links(self, title: str) -> Optional[list[str]]:
+        return self._fetch_links_batch([title])[title]
+
+    def _fetch_links_batch(self, titles: list[str]) -> dict[str, Optional[list[str]]]:
+        query = _links_query(titles)
+        collector = _LinkCollector(titles)
+        while True:
+            result = self._query(query)
+            collector.add(result)
             if cont := result.get("continue"):
                 query.update(cont)
             else:
                 break
-        return page_links.get(title, [])
+        return collector.results()
 
     def get_backlink_count(self, title: str) -> int:
-        query = {
-            "action": "query",
-            "format": "json",
-            "list": "backlinks",
-            "bltitle": title,
-            "blnamespace": 0,
-            "bllimit": 500,
-        }
+        cached = self._cached_backlinks(title)
+        if cached is not None and cached[1]:
+            return cached[0]
+        query = _backlinks_query(title)
         count = 0
         while True:
-            resp = requests.get(self.api_url, query, headers=HEADERS, timeout=30)
-            result = resp.json()
+            result = self._query(query)
             backlinks = result.get("query", {}).get("backlinks", [])
             count += len(backlinks)
             if cont := result.get("continue"):
@@ -100,4 +197,249 @@ class MediaWikiClient:
             else:
                 break
 
+        self._record_backlinks(title, count, exact=True)
         return count
+
+    def has_at_least_backlinks(self, title: str, n: int) -> bool:
+        """Return whether ``title`` has ``n`` or more backlinks, stopping as soon as it does."""
+        if n <= 0:
+            return True
+        decided = _threshold_decision(self._cached_backlinks(title), n)
+        if decided is not None:
+            return decided
+        query = _backlinks_query(title)
+        query["bllimit"] = min(n, 500)
+        count = 0
+        exact = False
+        while count < n:
+            result = self._query(query)
+            count += len(result.get("query", {}).get("backlinks", []))
+            if cont := result.get("continue"):
+                query.update(cont)
+            else:
+                exact = True
+                break
+        self._record_backlinks(title, count, exact=exact)
+        return count >= n
+
+    def has_at_least_backlinks_many(self, titles: Iterable[str], n: int) -> dict[str, bool]:
+        """Check the backlink threshold for many titles with batched ``prop=linkshere`` queries."""
+        results: dict[str, bool] = {}
+        pending: list[str] = []
+        for title in dict.fromkeys(titles):
+            decided = True if n <= 0 else _threshold_decision(self._cached_backlinks(title), n)
+            if decided is None:
+                pending.append(title)
+            else:
+                results[title] = decided
+        for start in range(0, len(pending), MAX_TITLES_PER_QUERY):
+            batch = pending[start : start + MAX_TITLES_PER_QUERY]
+            for title, count, exact in self._count_linkshere(batch, n):
+                self._record_backlinks(title, count, exact=exact)
+                results[title] = count >= n
+        return results
+
+    def _count_linkshere(self, titles: list[str], n: int) -> list[tuple[str, int, bool]]:
+        decided: list[tuple[str, int, bool]] = []
+        undecided = list(titles)
+        while undecided:
+            query = _linkshere_query(undecided)
+            aliases = {title: title for title in undecided}
+            counts: dict[str, int] = defaultdict(int)
+            while True:
+                result = self._query(query)
+                body = result.get("query", {})
+                for entry in body.get("normalized", []):
+                    aliases[entry["to"]] = aliases.get(entry["from"], entry["from"])
+                for _, page_info in body.get("pages", {}).items():
+                    requested = aliases.get(page_info["title"], page_info["title"])
+                    counts[requested] += len(page_info.get("linkshere", []))
+                cont = result.get("continue")
+                if not cont:
+                    decided.extend((title, counts[title], True) for title in undecided)
+                    undecided = []
+                    break
+                reached = [title for title in undecided if counts[title] >= n]
+                if reached:
+                    # Restart without the titles already over the threshold so the
+                    # remaining ones are not stuck behind their continuation pages.
+                    decided.extend((title, counts[title], False) for title in reached)
+                    undecided = [title for title in undecided if counts[title] < n]
+                    break
+                query.update(cont)
+        return decided
+
+    def _cached_backlinks(self, title: str) -> tuple[int, bool] | None:
+        with self._backlink_lock:
+            return self._backlink_counts.get(title)
+
+    def _record_backlinks(self, title: str, count: int, *, exact: bool) -> None:
+        with self._backlink_lock:
+            previous = self._backlink_counts.get(title)
+            if previous is not None and previous[1] and not exact:
+                return
+            if previous is not None and not exact and previous[0] >= count:
+                return
+            self._backlink_counts[title] = (count, exact)
+
+
+def build_wiki_client(config: WikiConfig) -> WikiClient:
+    if config.backend == "dump":
+        if not config.dump_dir:
+            raise ValueError("wiki.dump_dir is required when wiki.backend is 'dump'")
+        from .wikidump import DumpWikiClient
+
+        return DumpWikiClient(config.dump_dir)
+    if config.backend != "api":
+        raise ValueError(f"Unknown wiki backend: {config.backend}")
+    cache = None
+    if config.cache_path:
+        cache = LinkCache(
+            config.cache_path,
+            ttl_seconds=config.cache_ttl,
+            max_entries=config.cache_max_entries,
+        )
+    return MediaWikiClient(
+        config.api_url,
+        cache=cache,
+        pool_maxsize=config.pool_maxsize,
+        max_retries=config.max_retries,
+        backoff_factor=config.backoff_factor,
+        timeout=config.timeout,
+        requests_per_second=config.requests_per_second,
+    )
+
+
+def _random_query(limit: int) -> dict[str, Any]:
+    return {
+        "action": "query",
+        "format": "json",
+        "list": "random",
+        "rnlimit": limit,
+        "rnnamespace": 0,
+    }
+
+
+def _parse_random(result: dict[str, Any]) -> list[str]:
+    return [p["title"] for p in result["query"]["random"]]
+
+
+def _abstract_query(title: str) -> dict[str, Any]:
+    return {
+        "action": "query",
+        "format": "json",
+        "prop": "extracts",
+        "titles": title,
+        "exchars": 1000,
+        "exintro": 1,
+        "explaintext": 1,
+    }
+
+
+def _parse_abstract(result: dict[str, Any], title: str) -> Optional[str]:
+    for _, page_info in result["query"]["pages"].items():
+        if page_info["title"] == title:
+            return page_info.get("extract")
+    return None
+
+
+def _links_query(titles: list[str]) -> dict[str, Any]:
+    return {
+        "action": "query",
+        "format": "json",
+        "prop": "links",
+        "titles": "|".join(titles),
+        "pllimit": 500,
+        "plnamespace": 0,
+    }
+
+
+def _backlinks_query(title: str) -> dict[str, Any]:
+    return {
+        "action": "query",
+        "format": "json",
+        "list": "backlinks",
+        "bltitle": title,
+        "blnamespace": 0,
+        "bllimit": 500,
+    }
+
+
+def _linkshere_query(titles: list[str]) -> dict[str, Any]:
+    return {
+        "action": "query",
+        "format": "json",
+        "prop": "linkshere",
+        "titles": "|".join(titles),
+        "lhprop": "pageid",
+        "lhnamespace": 0,
+        "lhlimit": 500,
+    }
+
+
+def _threshold_decision(cached: tuple[int, bool] | None, n: int) -> bool | None:
+    if cached is None:
+        return None
+    count, exact = cached
+    if count >= n:
+        return True
+    if exact:
+        return False
+    return None
+
+
+class _LinkCollector:
+    """Merge ``prop=links`` (or ``prop=linkshere``) continuation pages per requested title."""
+
+    def __init__(self, titles: list[str], prop: str = "links"):
+        self.titles = titles
+        self.prop = prop
+        self.aliases = {title: title for title in titles}
+        self.page_links: dict[str, list[str]] = defaultdict(list)
+        self.missing: set[str] = set()
+
+    def add(self, result: dict[str, Any]) -> None:
+        body = result.get("query", {})
+        for entry in body.get("normalized", []):
+            self.aliases[entry["to"]] = self.aliases.get(entry["from"], entry["from"])
+        for _, page_info in body.get("pages", {}).items():
+            page_title = page_info["title"].strip()
+            requested = self.aliases.get(page_title, page_title)
+            if "missing" in page_info or "invalid" in page_info:
+                self.missing.add(requested)
+                continue
+            links = page_info.get(self.prop, [])
+            if not links:
+                continue
+            self.page_links[requested].extend(
+                [p["title"].strip() for p in links if "title" in p]
+            )
+
+    def results(self) -> dict[str, Optional[list[str]]]:
+        return {
+            title: None if title in self.missing else self.page_links.get(title, [])
+            for title in self.titles
+        }
+
+
+def _build_session(pool_maxsize: int, max_retries: int, backoff_factor: float) -> requests.Session:
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # One pool per host; pool_block caps concurrent connections to the wiki.
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
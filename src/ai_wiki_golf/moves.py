@@ -0,0 +1,131 @@
+"""Tolerant matching of the LLM's chosen page against the candidate list."""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable
+
+_WRAPPERS = {
+    "「": "」",
+    "『": "』",
+    "【": "】",
+    "[": "]",
+    "(": ")",
+    "<": ">",
+    "《": "》",
+    "〈": "〉",
+    '"': '"',
+    "'": "'",
+    "“": "”",
+    "‘": "’",
+    "*": "*",
+    "`": "`",
+}
+_TRAILING_PARTICLES = ("へ移動", "に移動", "です", "へ", "に", "を", "が", "だ")
+# A prefix must cover this share of a candidate unless the rest is a "(...)" disambiguator.
+_PREFIX_MIN_COVERAGE = 0.8
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(text: str) -> str:
+    """NFKC, case-fold, fold whitespace and peel surrounding quotes/brackets."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _SPACES.sub(" ", text).strip()
+    while len(text) >= 2 and _WRAPPERS.get(text[0]) == text[-1]:
+        text = text[1:-1].strip()
+    return text.replace("_", " ")
+
+
+class MoveResolver:
+    """Index of one turn's candidates for resolving near-miss move names.
+
+    ``resolve`` tries an exact match, then the normalised form (with and
+    without a trailing particle), then a unique normalised prefix match that
+    covers most of the candidate or leaves only a ``(...)`` disambiguator, and
+    finally a unique closest edit-distance match. Anything ambiguous is left
+    unresolved so the caller can ask the model again.
+    """
+
+    def __init__(self, candidates: Iterable[str]):
+        self.candidates = list(candidates)
+        self._exact = set(self.candidates)
+        self._normalized: dict[str, list[str]] = {}
+        for cand in self.candidates:
+            self._normalized.setdefault(normalize_title(cand), []).append(cand)
+        self.retries_saved = 0
+
+    def resolve(self, move: str) -> str | None:
+        if move in self._exact:
+            return move
+        match = self._fuzzy(move)
+        if match is not None:
+            self.retries_saved += 1
+        return match
+
+    def _fuzzy(self, move: str) -> str | None:
+        key = normalize_title(move)
+        if not key:
+            return None
+        variants = [key]
+        for particle in _TRAILING_PARTICLES:
+            if key.endswith(particle) and len(key) > len(particle):
+                variants.append(normalize_title(key[: -len(particle)]))
+        for variant in variants:
+            hits = self._normalized.get(variant, [])
+            if len(hits) == 1:
+                return hits[0]
+            if len(hits) > 1:
+                return None
+        if len(key) >= 2:
+            prefixed = [norm for norm in self._normalized if norm.startswith(key)]
+            if len(prefixed) > 1:
+                return None
+            if (
+                prefixed
+                and len(self._normalized[prefixed[0]]) == 1
+                and _close_prefix(key, prefixed[0])
+            ):
+                return self._normalized[prefixed[0]][0]
+        # Short titles are too close to each other for edit distance to be safe.
+        limit = len(key) // 4
+        if limit == 0:
+            return None
+        best: list[str] = []
+        best_distance = limit
+        for norm in self._normalized:
+            distance = _edit_distance(key, norm, best_distance)
+            if distance > best_distance:
+                continue
+            if distance < best_distance or not best:
+                best, best_distance = [norm], distance
+            else:
+                best.append(norm)
+        if len(best) == 1 and len(self._normalized[best[0]]) == 1:
+            return self._normalized[best[0]][0]
+        return None
+
+
+def _close_prefix(key: str, norm: str) -> bool:
+    """Whether ``key`` names ``norm`` rather than a different, longer title."""
+    rest = norm[len(key) :].strip()
+    if rest.startswith("(") and rest.endswith(")"):
+        return True
+    return len(key) >= _PREFIX_MIN_COVERAGE * len(norm)
+
+
+def _edit_distance(a: str, b: str, cutoff: int) -> int:
+    """Levenshtein distance, returning ``cutoff + 1`` once it must exceed ``cutoff``."""
+    if abs(len(a) - len(b)) > cutoff:
+        return cutoff + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > cutoff:
+            return cutoff + 1
+        previous = current
+    return previous[-1]
@@ -0,0 +1,283 @@
+"""Shortest start -> goal distance by bidirectional BFS over the wiki link graph.
+
+The search grows a forward tree from the start (``get_links_many``) and a
+backward tree from the goal (``get_backlinks_many``), always expanding the
+side with the smaller frontier, and stops as soon as the two trees touch.
+Frontiers are fetched in chunks so only one chunk of link lists is alive at a
+time; with ``wiki.cache_path`` set, every fetched link and backlink list is
+kept in the shared SQLite link cache, so re-running the oracle (or playing
+games over the same pages) does not hit the API again.
+
+The dump backend is searched over page ids with NumPy arrays instead, which
+keeps frontiers of hundreds of thousands of pages cheap.
+
+Distances are over the full link graph (minus digit titles when
+``exclude_digit_links`` is set). Redirect titles are nodes of their own on
+both sides, as in a game, where moving to one costs a turn. A game only ever sees ``max_links`` sampled
+links per page, so the oracle distance is a lower bound on the best score.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from .config import ExperimentConfig
+from .eval_pairs import PAIRS_FILE, load_eval_pairs, save_eval_pairs
+from .game import has_digit
+from .mediawiki import WikiClient, build_wiki_client
+
+# Used for the API backend when wiki.cache_path is not set.
+DEFAULT_CACHE_FILE = "link_cache.sqlite3"
+# Titles fetched per get_links_many / get_backlinks_many call.
+CHUNK_SIZE = 500
+# Pages expanded per vectorised step on the dump backend (bounds the edge arrays).
+ID_CHUNK_SIZE = 4096
+
+
+@dataclass
+class OracleResult:
+    # None when the goal is unreachable or the search stopped at its limits.
+    distance: int | None
+    path: list[str] | None = None
+    # Set when the search gave up: the distance is at least this.
+    min_distance: int | None = None
+    # Pages whose links or backlinks were fetched.
+    expanded: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"distance": self.distance, "path": self.path}
+        if self.min_distance is not None:
+            data["min_distance"] = self.min_distance
+        return data
+
+
+class ShortestPathOracle:
+    def __init__(
+        self,
+        wiki_client: Any,
+        *,
+        allowed: Callable[[str], bool] | None = None,
+        max_depth: int = 8,
+        max_visited: int = 2_000_000,
+    ):
+        self.wiki = wiki_client
+        self.allowed = allowed
+        self.max_depth = max_depth
+        self.max_visited = max_visited
+
+    def shortest_path(self, start: str, goal: str, *, max_depth: int | None = None) -> OracleResult:
+        """Search up to ``max_depth`` hops (default: the oracle's own limit)."""
+        if start == goal:
+            return OracleResult(0, [start])
+        if self.allowed is not None and not self.allowed(goal):
+            # The goal would never be offered as a candidate.
+            return OracleResult(None)
+        depth_limit = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+        if hasattr(self.wiki, "neighbours_many"):
+            return self._search_ids(start, goal, depth_limit)
+        return self._search_titles(start, goal, depth_limit)
+
+    def _search_titles(self, start: str, goal: str, max_depth: int) -> OracleResult:
+        # title -> previous title on the way from the start / next title on the way to the goal
+        forward: dict[str, Optional[str]] = {start: None}
+        backward: dict[str, Optional[str]] = {goal: None}
+        forward_frontier, backward_frontier = [start], [goal]
+        depth = expanded = 0
+        while forward_frontier and backward_frontier:
+            if depth >= max_depth or len(forward) + len(backward) > self.max_visited:
+                return OracleResult(None, min_distance=depth + 1, expanded=expanded)
+            expanded += min(len(forward_frontier), len(backward_frontier))
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self._expand_titles(
+                    forward_frontier, forward, backward, self.wiki.get_links_many, start
+                )
+            else:
+                backward_frontier, meet = self._expand_titles(
+                    backward_frontier, backward, forward, self._backlinks_many(), start
+                )
+            depth += 1
+            if meet is not None:
+                path = _walk(meet, forward)[::-1] + _walk(meet, backward)[1:]
+                return OracleResult(depth, path, expanded=expanded)
+        return OracleResult(None, expanded=expanded)
+
+    def _expand_titles(
+        self,
+        frontier: list[str],
+        seen: dict[str, Optional[str]],
+        other: dict[str, Optional[str]],
+        fetch: Callable[[Iterable[str]], dict[str, Optional[list[str]]]],
+        start: str,
+    ) -> tuple[list[str], str | None]:
+        """Expand one BFS level; returns the next frontier and the first title both sides reached."""
+        allowed = self.allowed
+        next_frontier: list[str] = []
+        for offset in range(0, len(frontier), CHUNK_SIZE):
+            for title, neighbours in fetch(frontier[offset : offset + CHUNK_SIZE]).items():
+                for neighbour in neighbours or ():
+                    if neighbour in seen:
+                        continue
+                    if allowed is not None and neighbour != start and not allowed(neighbour):
+                        continue
+                    seen[neighbour] = title
+                    if neighbour in other:
+                        # Both sides have been searched to their full depth before this
+                        # level, so the first meeting is already a shortest path.
+                        return next_frontier, neighbour
+                    next_frontier.append(neighbour)
+        return next_frontier, None
+
+    def _backlinks_many(self) -> Callable[[Iterable[str]], dict[str, Optional[list[str]]]]:
+        fetch = getattr(self.wiki, "get_backlinks_many", None)
+        if fetch is None:
+            raise TypeError(f"{type(self.wiki).__name__} cannot list backlinks")
+        return fetch
+
+    def _search_ids(self, start: str, goal: str, max_depth: int) -> OracleResult:
+        import numpy as np
+
+        wiki = self.wiki
+        start_id, goal_id = wiki.page_id(start), wiki.page_id(goal)
+        if start_id is None or goal_id is None:
+            return OracleResult(None)
+        if start_id == goal_id:
+            return OracleResult(0, [wiki.title(start_id)])
+        # Parent pointers per page id; -1 means not reached yet.
+        forward = np.full(len(wiki), -1, dtype=np.int32)
+        backward = np.full(len(wiki), -1, dtype=np.int32)
+        forward[start_id] = start_id
+        backward[goal_id] = goal_id
+        forward_frontier = np.array([start_id], dtype=np.int32)
+        backward_frontier = np.array([goal_id], dtype=np.int32)
+        depth = expanded = visited = 0
+        while forward_frontier.size and backward_frontier.size:
+            if depth >= max_depth or visited > self.max_visited:
+                return OracleResult(None, min_distance=depth + 1, expanded=expanded)
+            expanded += min(forward_frontier.size, backward_frontier.size)
+            if forward_frontier.size <= backward_frontier.size:
+                forward_frontier, meet = self._expand_ids(
+                    forward_frontier, forward, backward, start_id, False
+                )
+                visited += forward_frontier.size
+            else:
+                backward_frontier, meet = self._expand_ids(
+                    backward_frontier, backward, forward, start_id, True
+                )
+                visited += backward_frontier.size
+            depth += 1
+            if meet is not None:
+                ids = _walk_ids(meet, forward)[::-1] + _walk_ids(meet, backward)[1:]
+                return OracleResult(depth, [wiki.title(i) for i in ids], expanded=expanded)
+        return OracleResult(None, expanded=expanded)
+
+    def _expand_ids(
+        self, frontier: Any, seen: Any, other: Any, start_id: int, backward: bool
+    ) -> tuple[Any, int | None]:
+        import numpy as np
+
+        chunks = []
+        meet = None
+        for offset in range(0, frontier.size, ID_CHUNK_SIZE):
+            sources, targets = self.wiki.neighbours_many(
+                frontier[offset : offset + ID_CHUNK_SIZE], backward=backward
+            )
+            fresh = seen[targets] < 0
+            targets, first = np.unique(targets[fresh], return_index=True)
+            sources = sources[fresh][first]
+            if self.allowed is not None and targets.size:
+                keep = np.fromiter(
+                    (t == start_id or self.allowed(self.wiki.title(int(t))) for t in targets),
+                    dtype=bool,
+                    count=targets.size,
+                )
+                targets, sources = targets[keep], sources[keep]
+            seen[targets] = sources
+            met = targets[other[targets] >= 0]
+            if met.size:
+                meet = int(met[0])
+                break
+            chunks.append(targets)
+        next_frontier = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        return next_frontier.astype(np.int32, copy=False), meet
+
+
+def build_oracle_wiki_client(config: ExperimentConfig, exp_path: Path) -> WikiClient:
+    """Wiki client whose link cache persists under the experiment unless ``wiki.cache_path`` is set."""
+    wiki_config = config.wiki
+    if wiki_config.backend == "api" and not wiki_config.cache_path:
+        wiki_config = replace(
+            wiki_config, cache_path=str(exp_path / DEFAULT_CACHE_FILE), cache_max_entries=0
+        )
+    return build_wiki_client(wiki_config)
+
+
+def build_oracle(config: ExperimentConfig, wiki_client: Any, **kwargs: Any) -> ShortestPathOracle:
+    """Oracle over the graph the game actually offers (digit titles dropped if configured)."""
+    allowed = (lambda title: not has_digit(title)) if config.game.exclude_digit_links else None
+    return ShortestPathOracle(wiki_client, allowed=allowed, **kwargs)
+
+
+def solve_evaluation_pairs(
+    experiment_dir: str,
+    *,
+    max_depth: int = 8,
+    max_visited: int = 2_000_000,
+    force: bool = False,
+    wiki_client: Any = None,
+) -> list[dict[str, Any]]:
+    """Add ``distance`` and ``path`` to each evaluation pair and save them to ``evaluation_pairs.yaml``.
+
+    Pairs that already have a ``distance`` are kept unless ``force`` is set.
+    The file is rewritten after every pair, so an interrupted run resumes.
+    """
+    exp_path = Path(experiment_dir)
+    config_path = exp_path / "config.yaml"
+    if not config_path.exists():
+        raise FileNotFoundError("config.yaml not found")
+    config = ExperimentConfig.load(config_path)
+    if config.evaluation_pairs:
+        raise RuntimeError(
+            f"evaluation_pairs is set in config.yaml; move the pairs to {PAIRS_FILE} to store oracle results."
+        )
+    pairs = [dict(pair) for pair in load_eval_pairs(config, exp_path)]
+
+    owns_client = wiki_client is None
+    if owns_client:
+        wiki_client = build_oracle_wiki_client(config, exp_path)
+    oracle = build_oracle(config, wiki_client, max_depth=max_depth, max_visited=max_visited)
+    output_path = exp_path / PAIRS_FILE
+    try:
+        for idx, pair in enumerate(pairs, start=1):
+            if "distance" in pair and not force:
+                continue
+            result = oracle.shortest_path(pair["start"], pair["goal"])
+            pair.pop("min_distance", None)
+            pair.update(result.to_dict())
+            save_eval_pairs(pairs, output_path)
+            distance = result.distance if result.distance is not None else (
+                f">={result.min_distance}" if result.min_distance else "unreachable"
+            )
+            print(
+                f"[{idx}/{len(pairs)}] {pair['start']} -> {pair['goal']}: {distance}"
+                f" ({result.expanded} pages expanded)"
+            )
+    finally:
+        if owns_client:
+            wiki_client.close()
+    return pairs
+
+
+def _walk(title: str, parents: dict[str, Optional[str]]) -> list[str]:
+    path = [title]
+    while (parent := parents[path[-1]]) is not None:
+        path.append(parent)
+    return path
+
+
+def _walk_ids(page_id: int, parents: Any) -> list[int]:
+    path = [page_id]
+    while (parent := int(parents[path[-1]])) != path[-1]:
+        path.append(parent)
+    return path
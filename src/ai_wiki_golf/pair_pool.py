@@ -0,0 +1,106 @@
+"""Background pool of pre-validated start/goal pairs."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+
+class StartGoalPool:
+    """Hand out random start/goal pairs whose goal passes the backlink threshold.
+
+    Random titles are drawn ``batch_size`` at a time (one ``list=random``
+    request), half of them become start candidates and the other half goal
+    candidates, and all goals are checked with one batched backlink query.
+    Once started, a daemon thread keeps at least ``low_water`` pairs ready.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        min_goal_backlinks: int = 1,
+        batch_size: int = 500,
+        low_water: int = 8,
+    ):
+        self.client = client
+        self.min_goal_backlinks = max(0, min_goal_backlinks)
+        self.batch_size = max(2, batch_size)
+        self.low_water = max(1, low_water)
+        self.drawn = 0
+        # Drawn pairs whose goal failed the backlink threshold.
+        self.rejected = 0
+        self._pairs: deque[tuple[str, str]] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._error: Exception | None = None
+        self._closed = False
+
+    def refill(self) -> int:
+        """Draw one batch synchronously and return the number of pairs added."""
+        titles = list(dict.fromkeys(self.client.get_random_pages(limit=self.batch_size)))
+        half = len(titles) // 2
+        starts, goals = titles[:half], titles[half : half * 2]
+        passed = self.client.has_at_least_backlinks_many(goals, self.min_goal_backlinks)
+        ready = [(start, goal) for start, goal in zip(starts, goals) if passed.get(goal)]
+        with self._cond:
+            self.drawn += len(goals)
+            self.rejected += len(goals) - len(ready)
+            self._pairs.extend(ready)
+            self._cond.notify_all()
+        return len(ready)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="start-goal-pool", daemon=True
+            )
+            self._thread.start()
+
+    def get(self, timeout: float | None = None) -> tuple[str, str]:
+        """Return a ready pair, waiting for the background refill if necessary.
+
+        Raises ``TimeoutError`` when ``timeout`` elapses, and re-raises the last
+        refill error if the pool is empty because fetching failed.
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._pairs:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No start/goal pair ready")
+                self._cond.wait(remaining)
+            pair = self._pairs.popleft()
+            self._cond.notify_all()
+            return pair
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        delay = 1.0
+        while True:
+            with self._cond:
+                while not self._closed and len(self._pairs) >= self.low_water:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            try:
+                self.refill()
+                delay = 1.0
+            except Exception as exc:  # surfaced to the caller through get()
+                with self._cond:
+                    self._error = exc
+                    self._cond.notify_all()
+                time.sleep(delay)
+                delay = min(delay * 1.5, 10)
@@ -0,0 +1,91 @@
+"""Speculative background fetching of candidate page links."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+
+class LinkPrefetcher:
+    """Fetch links of likely next pages while the LLM is thinking.
+
+    ``prefetch`` ranks candidates, starts one batched ``get_links_many`` call
+    for the top ``limit`` of them and returns immediately. ``get_links``
+    serves from that result when the chosen page was prefetched and falls
+    back to a direct fetch otherwise.
+
+    Each ``prefetch`` replaces the previous picks, so use one prefetcher per
+    game; games may share an ``executor``.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        limit: int,
+        executor: ThreadPoolExecutor | None = None,
+        max_workers: int = 2,
+    ):
+        self.client = client
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prefetch"
+        )
+        self._pending: dict[str, Future[dict[str, Optional[list[str]]]]] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, candidates: Iterable[str], goal: str) -> list[str]:
+        """Start fetching the most promising candidates and return their titles."""
+        chosen = rank_candidates(candidates, goal)[: self.limit]
+        with self._lock:
+            kept = {title: self._pending[title] for title in chosen if title in self._pending}
+            missing = [title for title in chosen if title not in kept]
+            if missing:
+                future = self._executor.submit(self.client.get_links_many, missing)
+                kept.update({title: future for title in missing})
+            self._pending = kept
+        return chosen
+
+    def get_links(self, title: str) -> Optional[list[str]]:
+        with self._lock:
+            future = self._pending.get(title)
+        if future is not None:
+            try:
+                links = future.result()[title]
+            except Exception:
+                # A failed speculative fetch is retried on the normal path.
+                pass
+            else:
+                self.hits += 1
+                return links
+        self.misses += 1
+        return self.client.get_links(title)
+
+    def usage(self) -> dict[str, int]:
+        return {"prefetch_hits": self.hits, "prefetch_misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.cancel()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def rank_candidates(candidates: Iterable[str], goal: str) -> list[str]:
+    """Order candidates by character-bigram overlap with the goal title (stable)."""
+    goal_grams = _bigrams(goal)
+    scored = [(-len(goal_grams & _bigrams(title)), idx, title) for idx, title in enumerate(candidates)]
+    return [title for _, _, title in sorted(scored) if title != goal]
+
+
+def _bigrams(text: str) -> set[str]:
+    text = text.lower()
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i : i + 2] for i in range(len(text) - 1)}
@@ -0,0 +1,150 @@
+"""Process-wide request/token rate limiting and retry scheduling for LLM calls."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+from .config import LLMConfig
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``capacity`` per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take ``amount`` (possibly going into debt) and return the wait until it is covered."""
+        self._refill(now)
+        self._tokens -= min(amount, self.capacity)
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def adjust(self, delta: float, now: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the real cost is known."""
+        self._refill(now)
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class RateLimitScheduler:
+    """Admit LLM calls under RPM/TPM budgets and retry them with shared backoff.
+
+    One scheduler exists per provider/model in a process (see
+    ``get_scheduler``), so every concurrent game draws from the same buckets.
+    When any call is rate limited, all callers pause until the hinted
+    ``Retry-After`` (or the backoff delay) has passed.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_retries: int = 6,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def acquire(self, estimated_tokens: int) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.requests is not None:
+                wait = max(wait, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.reserve(estimated_tokens, now))
+        if wait > 0:
+            time.sleep(wait)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        if self.tokens is None or actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.adjust(actual_tokens - estimated_tokens, time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def backoff_delay(self, attempt: int, retry_after: float | None) -> float:
+        # Full jitter keeps concurrent games from retrying in lock-step.
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        *,
+        estimated_tokens: int,
+        classify: Callable[[Exception], tuple[bool, float | None] | None],
+        usage_tokens: Callable[[T], int | None] = lambda _: None,
+    ) -> T:
+        """Run ``fn`` under the budgets, retrying errors ``classify`` marks retryable.
+
+        ``classify`` returns ``None`` for fatal errors, otherwise
+        ``(rate_limited, retry_after_seconds)``.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated_tokens)
+            try:
+                result = fn()
+            except Exception as exc:
+                # A failed attempt did not consume its token reservation.
+                self.settle(estimated_tokens, 0)
+                verdict = classify(exc)
+                if verdict is None or attempt == self.max_retries:
+                    raise
+                rate_limited, retry_after = verdict
+                delay = self.backoff_delay(attempt, retry_after)
+                if rate_limited:
+                    self.pause(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            self.settle(estimated_tokens, usage_tokens(result))
+            return result
+        raise RuntimeError("unreachable")
+
+
+_SCHEDULERS: dict[tuple[str, str, str | None], RateLimitScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_scheduler(config: LLMConfig) -> RateLimitScheduler:
+    """Return the process-wide scheduler for this provider/model/endpoint."""
+    key = (config.provider, config.model, config.base_url)
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get(key)
+        if scheduler is None:
+            scheduler = RateLimitScheduler(
+                requests_per_minute=config.requests_per_minute,
+                tokens_per_minute=config.tokens_per_minute,
+                max_retries=config.max_retries,
+            )
+            _SCHEDULERS[key] = scheduler
+        return scheduler
+
+
+def estimate_tokens(messages: list[dict[str, str]]) -> int:
+    # Japanese text is close to one token per character for current tokenizers.
+    return sum(len(m.get("content", "")) for m in messages)
@@ -0,0 +1,89 @@
+"""Export per-turn timing spans and LLM call telemetry from game logs."""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from .log_store import iter_logs
+
+TOKEN_KEYS = ("input_tokens", "output_tokens", "cached_input_tokens")
+
+
+def iter_telemetry(experiment_dir: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield one flat record per step span and per LLM call in ``logs/`` and ``evaluates/``."""
+    exp_path = Path(experiment_dir)
+    for subdir in ("logs", "evaluates"):
+        for file_name, data in iter_logs(exp_path / subdir):
+            yield from _log_records(data.get("game") or {}, f"{subdir}/{file_name.split('.')[0]}")
+
+
+def _log_records(game: dict[str, Any], log: str) -> Iterator[dict[str, Any]]:
+    for turn, step in enumerate(game.get("history") or [], start=1):
+        for span, seconds in (step.get("timings") or {}).items():
+            yield {"type": "span", "log": log, "turn": turn, "span": span, "seconds": seconds}
+        for call in step.get("llm_calls") or []:
+            yield {"type": "llm_call", "log": log, "turn": turn, **call}
+    for span, seconds in (game.get("timings") or {}).items():
+        yield {"type": "span", "log": log, "turn": None, "span": f"game_{span}", "seconds": seconds}
+    for call in game.get("llm_calls") or []:
+        yield {"type": "llm_call", "log": log, "turn": None, **call}
+
+
+def write_jsonl(records: Iterable[dict[str, Any]], path: Path) -> int:
+    count = 0
+    with path.open("w", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def to_openmetrics(records: Iterable[dict[str, Any]]) -> str:
+    """Aggregate records into OpenMetrics text (summaries per span and call kind)."""
+    span_sum: dict[str, float] = defaultdict(float)
+    span_count: dict[str, int] = defaultdict(int)
+    call_sum: dict[str, float] = defaultdict(float)
+    call_count: dict[str, int] = defaultdict(int)
+    tokens: dict[tuple[str, str], int] = defaultdict(int)
+    for record in records:
+        if record["type"] == "span":
+            span_sum[record["span"]] += record["seconds"]
+            span_count[record["span"]] += 1
+        else:
+            kind = record.get("kind", "unknown")
+            call_sum[kind] += record.get("latency") or 0.0
+            call_count[kind] += 1
+            for key in TOKEN_KEYS:
+                if record.get(key) is not None:
+                    tokens[(kind, key)] += record[key]
+
+    lines = [
+        "# TYPE ai_wiki_golf_span_seconds summary",
+        "# UNIT ai_wiki_golf_span_seconds seconds",
+        "# HELP ai_wiki_golf_span_seconds Time spent per turn (or per game for game_* spans).",
+    ]
+    for span in sorted(span_sum):
+        lines.append(f'ai_wiki_golf_span_seconds_sum{{span="{span}"}} {span_sum[span]:.6f}')
+        lines.append(f'ai_wiki_golf_span_seconds_count{{span="{span}"}} {span_count[span]}')
+    lines += [
+        "# TYPE ai_wiki_golf_llm_call_seconds summary",
+        "# UNIT ai_wiki_golf_llm_call_seconds seconds",
+        "# HELP ai_wiki_golf_llm_call_seconds LLM call latency by call kind.",
+    ]
+    for kind in sorted(call_sum):
+        lines.append(f'ai_wiki_golf_llm_call_seconds_sum{{kind="{kind}"}} {call_sum[kind]:.6f}')
+        lines.append(f'ai_wiki_golf_llm_call_seconds_count{{kind="{kind}"}} {call_count[kind]}')
+    lines += [
+        "# TYPE ai_wiki_golf_llm_tokens counter",
+        "# HELP ai_wiki_golf_llm_tokens Tokens reported by the provider by call kind.",
+    ]
+    for kind, key in sorted(tokens):
+        token_type = key.removesuffix("_tokens")
+        lines.append(
+            f'ai_wiki_golf_llm_tokens_total{{kind="{kind}",type="{token_type}"}} {tokens[(kind, key)]}'
+        )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
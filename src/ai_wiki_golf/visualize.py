@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import math
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import gradio as gr
-import yaml
 
 from .evaluation import summarize_evaluation_results
+from .log_store import read_log, read_summaries
+
+PAGE_SIZE = 50
+LOG_CACHE_SIZE = 32
 
 
 def launch_dashboard(experiment_dir: str) -> None:
@@ -24,6 +29,11 @@ def launch_dashboard(experiment_dir: str) -> None:
                     datatype=["str", "str", "str", "number", "number"],
                     interactive=False,
                 )
+                with gr.Row():
+                    run_prev_btn = gr.Button("◀")
+                    run_page = gr.Number(value=1, precision=0, minimum=1, label="Page")
+                    run_next_btn = gr.Button("▶")
+                run_page_md = gr.Markdown()
                 log_selector = gr.Dropdown(label="Select Log", choices=[])
                 game_md = gr.Markdown(label="Game Summary")
                 chat_md = gr.Markdown(label="Chat Log")
@@ -36,60 +46,64 @@ def launch_dashboard(experiment_dir: str) -> None:
                     interactive=False,
                 )
                 eval_logs_table = gr.Dataframe(
-                    headers=["Log", "Book", "Start", "Goal", "Score", "Success"],
-                    datatype=["str", "number", "str", "str", "number", "str"],
+                    headers=["Log", "Book", "Start", "Goal", "Score", "Optimal", "Success"],
+                    datatype=["str", "number", "str", "str", "number", "number", "str"],
                     interactive=False,
                 )
+                with gr.Row():
+                    eval_prev_btn = gr.Button("◀")
+                    eval_page = gr.Number(value=1, precision=0, minimum=1, label="Page")
+                    eval_next_btn = gr.Button("▶")
+                eval_page_md = gr.Markdown()
                 eval_log_selector = gr.Dropdown(label="Select Evaluation Log", choices=[])
                 eval_game_md = gr.Markdown(label="Evaluation Summary")
                 eval_chat_md = gr.Markdown(label="Chat Log")
                 eval_book_md = gr.Markdown(label="Guide")
 
-        def load_run_overview(path: str):
+        def load_run_overview(path: str, page: float | None = 1):
             exp = Path(path)
             logs_dir = exp / "logs"
             rows: list[list[Any]] = []
             options: list[str] = []
-            if logs_dir.exists():
-                for log_file in sorted(logs_dir.glob("*.yaml")):
-                    data = _safe_load_yaml(log_file)
-                    history = data.get("game", {}).get("history", [])
-                    rows.append(
-                        [
-                            log_file.name,
-                            data.get("game", {}).get("start", "-"),
-                            data.get("game", {}).get("goal", "-"),
-                            data.get("game", {}).get("score", "-"),
-                            len(history),
-                        ]
-                    )
-                    options.append(log_file.name)
+            entries = _readable(read_summaries(logs_dir)) if logs_dir.exists() else []
+            page_entries, page, page_text = _paginate(entries, page)
+            for entry in page_entries:
+                rows.append(
+                    [
+                        entry["name"],
+                        entry.get("start") or "-",
+                        entry.get("goal") or "-",
+                        _or_dash(entry.get("score")),
+                        entry.get("steps", 0),
+                    ]
+                )
+                options.append(entry["name"])
             default = options[0] if options else None
-            return rows, gr.update(choices=options, value=default)
+            return rows, gr.update(choices=options, value=default), page, page_text
 
-        def load_eval_overview(path: str):
+        def load_eval_overview(path: str, page: float | None = 1):
             exp = Path(path)
             eval_dir = exp / "evaluates"
             rows: list[list[Any]] = []
             options: list[str] = []
-            if eval_dir.exists():
-                for log_file in sorted(eval_dir.glob("*.yaml")):
-                    data = _safe_load_yaml(log_file)
-                    game = data.get("game", {})
-                    score = game.get("score", "-")
-                    rows.append(
-                        [
-                            log_file.name,
-                            data.get("book_index", "-"),
-                            game.get("start", "-"),
-                            game.get("goal", "-"),
-                            score,
-                            _format_success(score),
-                        ]
-                    )
-                    options.append(log_file.name)
+            entries = _readable(read_summaries(eval_dir)) if eval_dir.exists() else []
+            page_entries, page, page_text = _paginate(entries, page)
+            for entry in page_entries:
+                score = _or_dash(entry.get("score"))
+                rows.append(
+                    [
+                        entry["name"],
+                        _or_dash(entry.get("book_index")),
+                        entry.get("start") or "-",
+                        entry.get("goal") or "-",
+                        score,
+                        _or_dash(entry.get("distance")),
+                        _format_success(score),
+                    ]
+                )
+                options.append(entry["name"])
             default = options[0] if options else None
-            return rows, gr.update(choices=options, value=default)
+            return rows, gr.update(choices=options, value=default), page, page_text
 
         def load_eval_stats_table(path: str):
             stats = summarize_evaluation_results(path)
@@ -109,17 +123,39 @@ def launch_dashboard(experiment_dir: str) -> None:
         def load_eval_detail(path: str, log_name: str | None):
             return _load_detail(Path(path), log_name, subdir="evaluates")
 
-        run_event = refresh_btn.click(load_run_overview, inputs=exp_input, outputs=[summary_table, log_selector])
+        run_outputs = [summary_table, log_selector, run_page, run_page_md]
+        run_event = refresh_btn.click(load_run_overview, inputs=exp_input, outputs=run_outputs)
         run_event.then(load_run_detail, inputs=[exp_input, log_selector], outputs=[game_md, chat_md, book_md])
-
-        eval_event = refresh_btn.click(
-            load_eval_overview, inputs=exp_input, outputs=[eval_logs_table, eval_log_selector]
+        run_page.submit(load_run_overview, inputs=[exp_input, run_page], outputs=run_outputs)
+        run_prev_btn.click(
+            lambda path, page: load_run_overview(path, (page or 1) - 1),
+            inputs=[exp_input, run_page],
+            outputs=run_outputs,
         )
+        run_next_btn.click(
+            lambda path, page: load_run_overview(path, (page or 1) + 1),
+            inputs=[exp_input, run_page],
+            outputs=run_outputs,
+        )
+
+        eval_outputs = [eval_logs_table, eval_log_selector, eval_page, eval_page_md]
+        eval_event = refresh_btn.click(load_eval_overview, inputs=exp_input, outputs=eval_outputs)
         eval_event.then(
             load_eval_detail,
             inputs=[exp_input, eval_log_selector],
             outputs=[eval_game_md, eval_chat_md, eval_book_md],
         )
+        eval_page.submit(load_eval_overview, inputs=[exp_input, eval_page], outputs=eval_outputs)
+        eval_prev_btn.click(
+            lambda path, page: load_eval_overview(path, (page or 1) - 1),
+            inputs=[exp_input, eval_page],
+            outputs=eval_outputs,
+        )
+        eval_next_btn.click(
+            lambda path, page: load_eval_overview(path, (page or 1) + 1),
+            inputs=[exp_input, eval_page],
+            outputs=eval_outputs,
+        )
 
         refresh_btn.click(load_eval_stats_table, inputs=exp_input, outputs=eval_summary_table)
 
@@ -141,7 +177,10 @@ def _load_detail(base_path: Path, log_name: str | None, subdir: str) -> tuple[st
     if not log_path.exists():
         return "ログが見つかりません", "", ""
 
-    data = _safe_load_yaml(log_path)
+    stat = log_path.stat()
+    data = _cached_log(str(log_path.parent), log_name, stat.st_mtime_ns, stat.st_size)
+    if data is None:
+        return "ログを読み込めません", "", ""
     game = data.get("game", {})
     history_lines = [
         f"{idx + 1}. {step.get('current', '-')} -> {step.get('choice', '-')}"
@@ -153,6 +192,9 @@ def _load_detail(base_path: Path, log_name: str | None, subdir: str) -> tuple[st
         f"**Score:** {game.get('score')}\n\n"
         "**History:**\n" + ("\n".join(history_lines) if history_lines else "(なし)")
     )
+    pair = data.get("pair") or {}
+    if pair.get("path"):
+        game_summary += f"\n\n**Optimal ({pair['distance']}):** " + " -> ".join(pair["path"])
 
     messages = data.get("messages", [])
     chat_lines = [f"### {m.get('role', 'unknown')}\n{m.get('content', '')}" for m in messages]
@@ -174,12 +216,25 @@ def _load_detail(base_path: Path, log_name: str | None, subdir: str) -> tuple[st
     return game_summary, chat_text, guide_text
 
 
-def _safe_load_yaml(path: Path) -> dict[str, Any]:
-    try:
-        data = yaml.safe_load(path.read_text(encoding="utf-8"))
-        return data or {}
-    except yaml.YAMLError:
-        return {}
+@lru_cache(maxsize=LOG_CACHE_SIZE)
+def _cached_log(log_dir: str, log_name: str, mtime_ns: int, size: int) -> dict[str, Any] | None:
+    # mtime and size are part of the key so rewritten logs are reloaded.
+    return read_log(Path(log_dir), log_name)
+
+
+def _readable(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [entry for entry in entries if not entry.get("broken")]
+
+
+def _paginate(entries: list[dict[str, Any]], page: float | None) -> tuple[list[dict[str, Any]], int, str]:
+    pages = max(1, math.ceil(len(entries) / PAGE_SIZE))
+    page = min(max(1, int(page or 1)), pages)
+    start = (page - 1) * PAGE_SIZE
+    return entries[start : start + PAGE_SIZE], page, f"{page} / {pages} ページ (全{len(entries)}件)"
+
+
+def _or_dash(value: Any) -> Any:
+    return "-" if value is None else value
 
 
 def _format_success(score: Any) -> str:
@@ -189,6 +244,4 @@ def _format_success(score: Any) -> str:
 
 
 def _infer_iteration(log_name: str) -> str:
-    if log_name.endswith(".yaml"):
-        return log_name[:-5]
-    return log_name
+    return log_name.split(".")[0]
@@ -0,0 +1,342 @@
+"""Offline link graph built from MediaWiki SQL dumps.
+
+``import_dump`` turns ``page``/``pagelinks``/``redirect`` (and, for dumps from
+2024 onward, ``linktarget``) SQL dumps into a compact directory:
+
+- ``titles.bin`` / ``title_offsets.npy``: UTF-8 titles of every non-redirect
+  article, sorted bytewise; a page's id is its position in this order.
+- ``redirect_titles.bin`` / ``redirect_offsets.npy`` / ``redirect_targets.npy``:
+  sorted redirect titles and the page id each one resolves to.
+- ``forward_offsets.npy`` / ``forward_targets.npy``: CSR adjacency of links.
+- ``backward_offsets.npy`` / ``backward_targets.npy``: CSR adjacency of backlinks.
+
+``DumpWikiClient`` memory-maps that directory and answers the same queries as
+``MediaWikiClient`` without any network access.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mmap
+import random
+import re
+from array import array
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Optional
+
+import numpy as np
+
+ARTICLE_NAMESPACE = 0
+
+_CREATE_RE = re.compile(r"^CREATE TABLE `(\w+)`")
+_COLUMN_RE = re.compile(r"^\s+`(\w+)`")
+_TUPLE_RE = re.compile(r"\(((?:[^()']|'(?:[^'\\]|\\.)*')*)\)")
+_FIELD_RE = re.compile(r"'((?:[^'\\]|\\.)*)'|([^,]+)")
+_ESCAPES = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+
+
+class DumpWikiClient:
+    """Read-only wiki backend over a graph directory written by ``import_dump``."""
+
+    def __init__(self, dump_dir: str | Path, *, seed: int | None = None):
+        self.dump_dir = Path(dump_dir).expanduser()
+        self._titles = _TitleTable(self.dump_dir / "titles.bin", self.dump_dir / "title_offsets.npy")
+        self._redirects = _TitleTable(
+            self.dump_dir / "redirect_titles.bin", self.dump_dir / "redirect_offsets.npy"
+        )
+        self._redirect_targets = _load(self.dump_dir / "redirect_targets.npy")
+        self._forward_offsets = _load(self.dump_dir / "forward_offsets.npy")
+        self._forward_targets = _load(self.dump_dir / "forward_targets.npy")
+        self._backward_offsets = _load(self.dump_dir / "backward_offsets.npy")
+        self._backward_targets = _load(self.dump_dir / "backward_targets.npy")
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def page_id(self, title: str) -> int | None:
+        """Resolve a title (following redirects) to its page id."""
+        key = _normalize_title(title).encode("utf-8")
+        idx = self._titles.find(key)
+        if idx is not None:
+            return idx
+        idx = self._redirects.find(key)
+        if idx is not None:
+            return int(self._redirect_targets[idx])
+        return None
+
+    def title(self, page_id: int) -> str:
+        return self._titles.get(page_id)
+
+    def neighbours(self, page_id: int, *, backward: bool = False) -> np.ndarray:
+        offsets = self._backward_offsets if backward else self._forward_offsets
+        targets = self._backward_targets if backward else self._forward_targets
+        return targets[offsets[page_id] : offsets[page_id + 1]]
+
+    def neighbours_many(self, page_ids: np.ndarray, *, backward: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """All edges out of (or, with ``backward``, into) ``page_ids`` as ``(sources, targets)``."""
+        offsets = self._backward_offsets if backward else self._forward_offsets
+        targets = self._backward_targets if backward else self._forward_targets
+        starts = offsets[page_ids].astype(np.int64)
+        counts = offsets[page_ids + 1] - starts
+        # Position of each edge in ``targets``: its page's start plus its rank within the page.
+        first = np.cumsum(counts) - counts
+        index = np.arange(int(counts.sum())) + np.repeat(starts - first, counts)
+        return np.repeat(page_ids, counts), targets[index]
+
+    def get_random_pages(self, limit: int = 1) -> list[str]:
+        ids = self._rng.sample(range(len(self._titles)), min(limit, len(self._titles)))
+        return [self.title(i) for i in ids]
+
+    def get_page_abstract(self, title: str) -> Optional[str]:
+        # Page text is not part of the link dumps.
+        return None
+
+    def get_links(self, title: str) -> Optional[list[str]]:
+        page_id = self.page_id(title)
+        if page_id is None:
+            return None
+        return [self.title(int(t)) for t in self.neighbours(page_id)]
+
+    def get_links_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        return {title: self.get_links(title) for title in dict.fromkeys(titles)}
+
+    def get_backlinks_many(self, titles: Iterable[str]) -> dict[str, Optional[list[str]]]:
+        results: dict[str, Optional[list[str]]] = {}
+        for title in dict.fromkeys(titles):
+            page_id = self.page_id(title)
+            results[title] = (
+                None
+                if page_id is None
+                else [self.title(int(t)) for t in self.neighbours(page_id, backward=True)]
+            )
+        return results
+
+    def get_backlink_count(self, title: str) -> int:
+        page_id = self.page_id(title)
+        if page_id is None:
+            return 0
+        return int(self._backward_offsets[page_id + 1] - self._backward_offsets[page_id])
+
+    def has_at_least_backlinks(self, title: str, n: int) -> bool:
+        return n <= 0 or self.get_backlink_count(title) >= n
+
+    def has_at_least_backlinks_many(self, titles: Iterable[str], n: int) -> dict[str, bool]:
+        return {title: self.has_at_least_backlinks(title, n) for title in dict.fromkeys(titles)}
+
+    def close(self) -> None:
+        """Release the memory maps; the client cannot be used afterwards."""
+        self._titles.close()
+        self._redirects.close()
+        # np.memmap has no close(); dropping the last reference unmaps the file.
+        del self._redirect_targets
+        del self._forward_offsets, self._forward_targets
+        del self._backward_offsets, self._backward_targets
+
+
+class _TitleTable:
+    """Bytewise-sorted UTF-8 titles with binary search over a memory map."""
+
+    def __init__(self, blob_path: Path, offsets_path: Path):
+        self._offsets = _load(offsets_path)
+        self._file = blob_path.open("rb")
+        size = blob_path.stat().st_size
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _bytes(self, idx: int) -> bytes:
+        return self._blob[int(self._offsets[idx]) : int(self._offsets[idx + 1])]
+
+    def get(self, idx: int) -> str:
+        return self._bytes(idx).decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+        del self._offsets
+
+    def find(self, key: bytes) -> int | None:
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self._bytes(lo) == key:
+            return lo
+        return None
+
+
+def import_dump(
+    page_dump: Path,
+    pagelinks_dump: Path,
+    redirect_dump: Path,
+    output_dir: Path,
+    *,
+    linktarget_dump: Path | None = None,
+) -> int:
+    """Build the graph directory from SQL dumps and return the number of pages."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    page_titles: dict[int, str] = {}
+    redirect_ids: set[int] = set()
+    for row in _iter_rows(page_dump, ("page_id", "page_namespace", "page_title", "page_is_redirect")):
+        if int(row[1]) != ARTICLE_NAMESPACE:
+            continue
+        page_id = int(row[0])
+        page_titles[page_id] = _normalize_title(row[2])
+        if row[3] == "1":
+            redirect_ids.add(page_id)
+
+    articles = sorted(
+        (title for pid, title in page_titles.items() if pid not in redirect_ids),
+        key=lambda t: t.encode("utf-8"),
+    )
+    node_of_title = {title: idx for idx, title in enumerate(articles)}
+    node_of_page = {
+        pid: node_of_title[title] for pid, title in page_titles.items() if pid not in redirect_ids
+    }
+
+    redirects: dict[str, int] = {}
+    for row in _iter_rows(redirect_dump, ("rd_from", "rd_namespace", "rd_title")):
+        if int(row[1]) != ARTICLE_NAMESPACE:
+            continue
+        source = page_titles.get(int(row[0]))
+        target = node_of_title.get(_normalize_title(row[2]))
+        if source is not None and target is not None:
+            redirects[source] = target
+
+    def resolve(title: str) -> int | None:
+        node = node_of_title.get(title)
+        return node if node is not None else redirects.get(title)
+
+    sources = array("i")
+    targets = array("i")
+    if linktarget_dump is not None:
+        link_targets: dict[int, int] = {}
+        for row in _iter_rows(linktarget_dump, ("lt_id", "lt_namespace", "lt_title")):
+            if int(row[1]) != ARTICLE_NAMESPACE:
+                continue
+            node = resolve(_normalize_title(row[2]))
+            if node is not None:
+                link_targets[int(row[0])] = node
+        rows = _iter_rows(pagelinks_dump, ("pl_from", "pl_target_id"))
+        for row in rows:
+            source = node_of_page.get(int(row[0]))
+            target = link_targets.get(int(row[1]))
+            if source is not None and target is not None and source != target:
+                sources.append(source)
+                targets.append(target)
+    else:
+        rows = _iter_rows(pagelinks_dump, ("pl_from", "pl_namespace", "pl_title"))
+        for row in rows:
+            if int(row[1]) != ARTICLE_NAMESPACE:
+                continue
+            source = node_of_page.get(int(row[0]))
+            target = resolve(_normalize_title(row[2]))
+            if source is not None and target is not None and source != target:
+                sources.append(source)
+                targets.append(target)
+
+    src = np.frombuffer(sources, dtype=np.int32)
+    dst = np.frombuffer(targets, dtype=np.int32)
+    _write_csr(output_dir, "forward", src, dst, len(articles))
+    _write_csr(output_dir, "backward", dst, src, len(articles))
+
+    _write_titles(output_dir / "titles.bin", output_dir / "title_offsets.npy", articles)
+    redirect_titles = sorted(redirects, key=lambda t: t.encode("utf-8"))
+    _write_titles(
+        output_dir / "redirect_titles.bin", output_dir / "redirect_offsets.npy", redirect_titles
+    )
+    np.save(
+        output_dir / "redirect_targets.npy",
+        np.array([redirects[t] for t in redirect_titles], dtype=np.int32),
+    )
+    return len(articles)
+
+
+def _write_csr(output_dir: Path, name: str, src: np.ndarray, dst: np.ndarray, size: int) -> None:
+    order = np.lexsort((dst, src))
+    src = src[order]
+    dst = dst[order]
+    if len(src):
+        # Drop duplicate edges (the same link may appear via a redirect and directly).
+        keep = np.ones(len(src), dtype=bool)
+        keep[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src = src[keep]
+        dst = dst[keep]
+    counts = np.bincount(src, minlength=size)
+    offset_dtype = np.int32 if len(dst) < np.iinfo(np.int32).max else np.int64
+    offsets = np.zeros(size + 1, dtype=offset_dtype)
+    np.cumsum(counts, out=offsets[1:])
+    np.save(output_dir / f"{name}_offsets.npy", offsets)
+    np.save(output_dir / f"{name}_targets.npy", dst.astype(np.int32))
+
+
+def _write_titles(blob_path: Path, offsets_path: Path, titles: list[str]) -> None:
+    offsets = np.zeros(len(titles) + 1, dtype=np.int64)
+    with blob_path.open("wb") as fh:
+        position = 0
+        for idx, title in enumerate(titles, start=1):
+            data = title.encode("utf-8")
+            fh.write(data)
+            position += len(data)
+            offsets[idx] = position
+    np.save(offsets_path, offsets)
+
+
+def _load(path: Path) -> np.ndarray:
+    return np.load(path, mmap_mode="r")
+
+
+def _normalize_title(title: str) -> str:
+    return title.replace("_", " ").strip()
+
+
+def _open_dump(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return path.open("r", encoding="utf-8", errors="replace")
+
+
+def _iter_rows(path: Path, columns: tuple[str, ...]) -> Iterator[tuple[str, ...]]:
+    """Yield the requested columns of every row in a mysqldump file."""
+    table_columns: list[str] = []
+    indices: list[int] | None = None
+    in_create = False
+    with _open_dump(path) as fh:
+        for line in fh:
+            if in_create:
+                if match := _COLUMN_RE.match(line):
+                    table_columns.append(match.group(1))
+                elif line.startswith(")"):
+                    in_create = False
+                    missing = [c for c in columns if c not in table_columns]
+                    if missing:
+                        raise ValueError(f"{path}: columns not found in dump: {', '.join(missing)}")
+                    indices = [table_columns.index(c) for c in columns]
+                continue
+            if _CREATE_RE.match(line):
+                in_create = True
+                table_columns = []
+                continue
+            if not line.startswith("INSERT INTO"):
+                continue
+            if indices is None:
+                raise ValueError(f"{path}: INSERT found before CREATE TABLE")
+            for match in _TUPLE_RE.finditer(line, line.index(" VALUES ")):
+                fields = [
+                    _unescape(field.group(1)) if field.group(1) is not None else field.group(2)
+                    for field in _FIELD_RE.finditer(match.group(1))
+                ]
+                yield tuple(fields[i] for i in indices)
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), value)
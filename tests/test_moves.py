@@ -0,0 +1,21 @@
+from ai_wiki_golf.moves import MoveResolver
+
+
+def test_prefix_with_disambiguator_is_accepted() -> None:
+    resolver = MoveResolver(["メルクリウス (ローマ神話)", "ユピテル"])
+
+    assert resolver.resolve("メルクリウス") == "メルクリウス (ローマ神話)"
+    assert resolver.retries_saved == 1
+
+
+def test_prefix_covering_most_of_the_title_is_accepted() -> None:
+    resolver = MoveResolver(["東京都庁舎", "大阪"])
+
+    assert resolver.resolve("東京都庁") == "東京都庁舎"
+
+
+def test_short_prefix_of_a_different_article_is_rejected() -> None:
+    resolver = MoveResolver(["日本国憲法", "アメリカ合衆国"])
+
+    assert resolver.resolve("日本") is None
+    assert resolver.retries_saved == 0
@@ -0,0 +1,51 @@
+from typing import Any
+
+from ai_wiki_golf.mediawiki import MediaWikiClient
+from ai_wiki_golf.oracle import ShortestPathOracle
+
+# "Redirect" points at "Goal"; pages link to titles as written, so a game can
+# reach Goal from Start in two moves: Start -> Redirect -> Goal.
+LINKS = {
+    "Start": ["Redirect", "A"],
+    "Redirect": ["Goal"],
+    "A": ["B"],
+    "B": ["Goal"],
+    "Goal": [],
+}
+REDIRECTS = {"Redirect"}
+
+
+class FakeApiClient(MediaWikiClient):
+    def __init__(self) -> None:
+        super().__init__("http://wiki.invalid/w/api.php")
+
+    def _query(self, params: dict[str, Any]) -> dict[str, Any]:
+        titles = params["titles"].split("|")
+        pages = {}
+        for idx, title in enumerate(titles):
+            if params["prop"] == "links":
+                entries = [{"ns": 0, "title": t} for t in LINKS[title]]
+            else:
+                entries = [
+                    {"ns": 0, "title": source}
+                    for source, targets in LINKS.items()
+                    if title in targets
+                    and not (params.get("lhshow") == "!redirect" and source in REDIRECTS)
+                ]
+            pages[str(idx)] = {"title": title, params["prop"]: entries}
+        return {"query": {"pages": pages}}
+
+
+def test_shortest_path_through_redirect() -> None:
+    oracle = ShortestPathOracle(FakeApiClient())
+
+    result = oracle.shortest_path("Start", "Goal")
+
+    assert result.distance == 2
+    assert result.path == ["Start", "Redirect", "Goal"]
+
+
+def test_backward_search_sees_redirects() -> None:
+    backlinks = FakeApiClient().get_backlinks_many(["Goal"])
+
+    assert sorted(backlinks["Goal"]) == ["B", "Redirect"]